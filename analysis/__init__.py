@@ -0,0 +1,11 @@
+"""
+Offline analysis helpers used by the clustering notebook
+"""
+
+from .consensus import align_labels, coassociation_matrix, consensus_kmeans
+
+__all__ = [
+    'align_labels',
+    'coassociation_matrix',
+    'consensus_kmeans',
+]
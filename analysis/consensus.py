@@ -0,0 +1,150 @@
+"""
+Consensus (ensemble) K-Means clustering
+
+Runs many subsample K-Means fits in parallel worker processes, aligns every
+run's labels to a reference labelling, and reports a majority-vote consensus
+label plus a per-patient stability score.
+
+Per-patient stability (mean co-association with the other members of the
+patient's consensus cluster) is computed in closed form from per-run label
+counts, which is O(n * n_runs), so the full co-association matrix (fraction
+of runs in which two patients share a cluster) is never needed.
+
+An explicit co-association matrix can still be built for inspection with
+coassociation_matrix on a sample of the aligned run labels. It is built in
+row blocks and sparsified to each row's top_k strongest entries; computing
+it is quadratic, so it is meant for a sample only.
+"""
+
+import numpy as np
+from joblib import Parallel, delayed
+from scipy import sparse
+from scipy.optimize import linear_sum_assignment
+from sklearn.cluster import KMeans
+
+
+def _fit_subsample(X, k, sample_frac, seed, n_init, chunk_size):
+    """Fit K-Means on a random subsample and assign every row to its nearest centroid"""
+    rng = np.random.default_rng(seed)
+    n = X.shape[0]
+    sample_size = max(k, int(round(sample_frac * n)))
+    idx = rng.choice(n, size=sample_size, replace=False)
+
+    km = KMeans(n_clusters=k, random_state=seed, n_init=n_init)
+    km.fit(X[idx])
+
+    centers = km.cluster_centers_
+    center_sq = np.einsum('ij,ij->i', centers, centers)
+    labels = np.empty(n, dtype=np.int16)
+    for start in range(0, n, chunk_size):
+        block = X[start:start + chunk_size]
+        # ||x||^2 is constant per row, so it does not change the argmin
+        d = center_sq - 2.0 * (block @ centers.T)
+        labels[start:start + chunk_size] = np.argmin(d, axis=1)
+    return labels
+
+
+def align_labels(labels, reference, k):
+    """Permute one run's labels to best match the reference (Hungarian matching)"""
+    contingency = np.bincount(
+        reference.astype(np.int64) * k + labels, minlength=k * k
+    ).reshape(k, k)
+    ref_idx, run_idx = linear_sum_assignment(-contingency)
+    mapping = np.empty(k, dtype=np.int16)
+    mapping[run_idx] = ref_idx
+    return mapping[labels]
+
+
+def coassociation_matrix(signatures, block_size=1024, min_coassociation=0.1, top_k=50):
+    """
+    Sparse co-association matrix between label signatures.
+
+    signatures: (m, n_runs) array of aligned labels, one row per signature
+    (or per patient). Each row keeps at most its top_k strongest entries
+    that reach min_coassociation, so the result has at most m * top_k
+    non-zeros; top_k=None keeps every entry above the threshold. Returns an
+    (m, m) CSR matrix.
+
+    Time is still quadratic in m (every block is scored against all rows),
+    so use this on a sample; per-patient stability and vote share from
+    consensus_kmeans are the full-dataset summaries.
+    """
+    m, n_runs = signatures.shape
+    k = int(signatures.max()) + 1
+
+    # One-hot over (run, label): H @ H.T counts the runs where two signatures agree
+    cols = (np.arange(n_runs) * k)[None, :] + signatures
+    indptr = np.arange(0, m * n_runs + 1, n_runs)
+    H = sparse.csr_matrix(
+        (np.ones(m * n_runs, dtype=np.float32), cols.ravel(), indptr),
+        shape=(m, n_runs * k)
+    )
+    HT = H.T.tocsc()
+
+    blocks = []
+    for start in range(0, m, block_size):
+        block = (H[start:start + block_size] @ HT).toarray() / n_runs
+        if top_k is not None and top_k < m:
+            keep = np.argpartition(-block, top_k - 1, axis=1)[:, :top_k]
+            values = np.take_along_axis(block, keep, axis=1).ravel()
+            rows = np.repeat(np.arange(len(block)), top_k)
+            mask = values >= min_coassociation
+            blocks.append(sparse.csr_matrix(
+                (values[mask], (rows[mask], keep.ravel()[mask])), shape=block.shape
+            ))
+        else:
+            block[block < min_coassociation] = 0.0
+            blocks.append(sparse.csr_matrix(block))
+    return sparse.vstack(blocks, format='csr')
+
+
+def consensus_kmeans(X, k, n_runs=50, sample_frac=0.8, reference_labels=None,
+                     n_jobs=-1, random_state=42, n_init=3, chunk_size=65536):
+    """
+    Subsample-ensemble consensus K-Means.
+
+    Returns a dict with:
+      'labels'         consensus label per row (majority vote over aligned runs)
+      'vote_share'     fraction of runs that voted for the consensus label
+      'stability'      mean co-association with the row's consensus cluster
+      'run_labels'     (n, n_runs) int16 matrix of aligned run labels
+                       (pass a sample of rows to coassociation_matrix)
+    """
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    n = X.shape[0]
+    seeds = np.random.SeedSequence(random_state).generate_state(n_runs)
+
+    runs = Parallel(n_jobs=n_jobs)(
+        delayed(_fit_subsample)(X, k, sample_frac, int(seed), n_init, chunk_size)
+        for seed in seeds
+    )
+
+    reference = runs[0] if reference_labels is None else np.asarray(reference_labels)
+    run_labels = np.empty((n, n_runs), dtype=np.int16)
+    for b, labels in enumerate(runs):
+        run_labels[:, b] = align_labels(labels, reference, k)
+
+    # Majority vote
+    votes = np.zeros((n, k), dtype=np.int32)
+    for b in range(n_runs):
+        votes[np.arange(n), run_labels[:, b]] += 1
+    consensus = np.argmax(votes, axis=1)
+    vote_share = votes[np.arange(n), consensus] / n_runs
+
+    # Stability: for row i in consensus cluster c,
+    #   sum_j C[i, j] over j in c  =  (1/B) * sum_b  #{j in c : L[j, b] == L[i, b]}
+    stability = np.zeros(n, dtype=np.float64)
+    cluster_sizes = np.bincount(consensus, minlength=k)
+    for b in range(n_runs):
+        counts = np.bincount(consensus * k + run_labels[:, b], minlength=k * k).reshape(k, k)
+        stability += counts[consensus, run_labels[:, b]]
+    # Exclude the self-pair (always 1) and normalise by the other members
+    others = np.maximum(cluster_sizes[consensus] - 1, 1)
+    stability = (stability / n_runs - 1.0) / others
+
+    return {
+        'labels': consensus,
+        'vote_share': vote_share,
+        'stability': stability,
+        'run_labels': run_labels
+    }
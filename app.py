@@ -3,44 +3,12 @@ Flask API for Cluster Prediction
 Deploy this to Railway/Render instead of Vercel Python function
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
-import sys
 import os
 
-# Add api directory to path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'api'))
-
-# Import prediction functions
-try:
-    # Try importing from api directory
-    import sys
-    api_path = os.path.join(os.path.dirname(__file__), 'api')
-    if api_path not in sys.path:
-        sys.path.insert(0, api_path)
-    
-    from predict import get_models, preprocess_input, predict_cluster
-    print("Successfully imported prediction functions")
-except ImportError as e:
-    print(f"Import error: {e}")
-    import traceback
-    traceback.print_exc()
-    # Fallback if import fails
-    try:
-        import importlib.util
-        predict_path = os.path.join(os.path.dirname(__file__), 'api', 'predict.py')
-        spec = importlib.util.spec_from_file_location("predict", predict_path)
-        predict_module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(predict_module)
-        get_models = predict_module.get_models
-        preprocess_input = predict_module.preprocess_input
-        predict_cluster = predict_module.predict_cluster
-        print("Successfully loaded prediction functions via importlib")
-    except Exception as e2:
-        print(f"Failed to load prediction functions: {e2}")
-        import traceback
-        traceback.print_exc()
-        raise
+from inference import DEFAULT_SIMILAR_PATIENTS, RequestError, get_model, get_registry, parse_neighbors
+from inference import wire
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
@@ -60,50 +28,79 @@ def predict():
             'Access-Control-Allow-Headers': 'Content-Type'
         }
     
+    if request.mimetype == wire.CONTENT_TYPE:
+        return predict_binary()
+    
     try:
         print("Received prediction request")
         data = request.get_json()
         if not data:
             return jsonify({'error': 'No data provided'}), 400
         
+        records = data.get('records')
+        if records is not None:
+            # JSON batch: same response layout as the binary format's JSON reply
+            if not isinstance(records, list) or not records or not all(isinstance(r, dict) for r in records):
+                return jsonify({'error': "'records' must be a non-empty list of objects"}), 400
+            model = get_registry().get(data.get('model'))
+            X, _ = model.encode(records)
+            _, clusters, distances, margins = model.score_matrix(X)
+            return jsonify(batch_response(clusters, distances, margins)), 200
+        
         input_data = data.get('data', {})
         if not input_data:
             return jsonify({'error': 'No input data'}), 400
         
+        neighbors = parse_neighbors(data.get('neighbors', DEFAULT_SIMILAR_PATIENTS))
+        registry = get_registry()
+        if data.get('models'):
+            # Compare one record across several k / feature-set variants
+            return jsonify(registry.predict_all(input_data, data['models'])), 200
+        
         print("Loading models...")
-        # Get models and predict
-        scaler, label_encoders, kmeans_model, feature_info, cluster_profiles = get_models()
-        print("Models loaded, preprocessing input...")
-        X_processed = preprocess_input(input_data, feature_info, label_encoders)
-        print("Making prediction...")
-        cluster_id = predict_cluster(X_processed, scaler, kmeans_model)
-        cluster_info = cluster_profiles.get(cluster_id, {})
-        print(f"Prediction complete: Cluster {cluster_id}")
+        model = registry.get(data.get('model'))
+        print("Models loaded, predicting...")
+        response, _ = model.predict_one(input_data, neighbors)
+        print(f"Prediction complete: Cluster {response['cluster']}")
         
-        # Convert numpy types to native Python types
-        import numpy as np
-        if cluster_info:
-            if 'numeric_means' in cluster_info:
-                cluster_info['numeric_means'] = {
-                    k: float(v) if isinstance(v, (np.integer, np.floating)) else v
-                    for k, v in cluster_info['numeric_means'].items()
-                }
-            if 'readmission_dist' in cluster_info:
-                cluster_info['readmission_dist'] = {
-                    k: float(v) if isinstance(v, (np.integer, np.floating)) else v
-                    for k, v in cluster_info['readmission_dist'].items()
-                }
-            if 'size' in cluster_info:
-                cluster_info['size'] = int(cluster_info['size'])
-            if 'percentage' in cluster_info:
-                cluster_info['percentage'] = float(cluster_info['percentage'])
+        return jsonify(response), 200
         
+    except RequestError as e:
+        return jsonify({'error': 'Invalid request', 'message': str(e)}), 400
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
         return jsonify({
-            'success': True,
-            'cluster': cluster_id,
-            'cluster_info': cluster_info
-        }), 200
+            'error': 'Prediction failed',
+            'message': str(e)
+        }), 500
+
+def batch_response(clusters, distances, margins):
+    """JSON payload for a batch of predictions"""
+    return {
+        'success': True,
+        'clusters': clusters.tolist(),
+        'distance_to_centroid': distances.tolist(),
+        'centroid_margin': margins.tolist()
+    }
+
+def predict_binary():
+    """Batch prediction for the compact binary format (see inference/wire.py)"""
+    try:
+        model = get_registry().get(request.args.get('model'))
+        X, _ = wire.decode_request(request.get_data(cache=False), model)
+        _, clusters, distances, margins = model.score_matrix(X)
+        
+        if wire.CONTENT_TYPE in request.headers.get('Accept', ''):
+            body = wire.encode_response(clusters, distances, margins)
+            return Response(body, status=200, mimetype=wire.CONTENT_TYPE)
+        
+        return jsonify(batch_response(clusters, distances, margins)), 200
         
+    except wire.WireFormatError as e:
+        return jsonify({'error': 'Invalid binary request', 'message': str(e)}), 400
+    except RequestError as e:
+        return jsonify({'error': 'Invalid request', 'message': str(e)}), 400
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -112,6 +109,37 @@ def predict():
             'message': str(e)
         }), 500
 
+@app.route('/schema', methods=['GET'])
+def schema():
+    """Feature order and code tables for the binary request format"""
+    try:
+        return jsonify(wire.wire_schema(get_registry().get(request.args.get('model')))), 200
+    except RequestError as e:
+        return jsonify({'error': 'Invalid request', 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': 'Schema unavailable', 'message': str(e)}), 500
+
+@app.route('/drift', methods=['GET'])
+def drift():
+    """Drift report: incoming patients vs training statistics"""
+    try:
+        model = get_model()
+        if model.drift_monitor is None:
+            return jsonify({'error': 'Drift monitoring not enabled'}), 503
+        return jsonify(model.drift_monitor.report()), 200
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return jsonify({
+            'error': 'Drift report failed',
+            'message': str(e)
+        }), 500
+
+@app.route('/models', methods=['GET'])
+def models():
+    """Configured model variants and what the registry has loaded"""
+    return jsonify(get_registry().status()), 200
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 8080))
     print(f"Starting Flask app on port {port}")
@@ -9,10 +9,11 @@ and predict which cluster they belong to based on the trained K-Means model.
 import streamlit as st
 import pandas as pd
 import numpy as np
-import pickle
 import os
 from pathlib import Path
 
+from inference import load_model
+
 # Page configuration
 st.set_page_config(
     page_title="Patient Cluster Predictor",
@@ -57,28 +58,7 @@ def load_models():
     """Load all saved models and encoders"""
     try:
         models_dir = Path('models')
-        
-        # Load scaler
-        with open(models_dir / 'scaler.pkl', 'rb') as f:
-            scaler = pickle.load(f)
-        
-        # Load label encoders
-        with open(models_dir / 'label_encoders.pkl', 'rb') as f:
-            label_encoders = pickle.load(f)
-        
-        # Load K-Means model
-        with open(models_dir / 'kmeans_model.pkl', 'rb') as f:
-            kmeans_model = pickle.load(f)
-        
-        # Load feature info
-        with open(models_dir / 'feature_info.pkl', 'rb') as f:
-            feature_info = pickle.load(f)
-        
-        # Load cluster profiles
-        with open(models_dir / 'cluster_profiles.pkl', 'rb') as f:
-            cluster_profiles = pickle.load(f)
-        
-        return scaler, label_encoders, kmeans_model, feature_info, cluster_profiles
+        return load_model(models_dir, neighbors=False)
     except FileNotFoundError as e:
         st.error(f"❌ Model files not found. Please run the notebook to generate models first.")
         st.error(f"Missing file: {e}")
@@ -303,58 +283,12 @@ def create_input_form(feature_info, unique_values):
     
     return input_data
 
-def preprocess_input(input_data, feature_info, label_encoders):
-    """Preprocess user input to match training data format"""
-    numeric_features = feature_info['numeric_features']
-    categorical_features = feature_info['categorical_features']
-    medication_features = feature_info['medication_features']
-    
-    # Create DataFrame with single row
-    df_input = pd.DataFrame([input_data])
-    
-    # Separate features
-    X_numeric = df_input[numeric_features].copy()
-    X_categorical = df_input[categorical_features].copy()
-    X_medications = df_input[medication_features].copy()
-    
-    # Encode categorical features
-    X_categorical_encoded = X_categorical.copy()
-    for col in categorical_features:
-        if col in label_encoders:
-            le = label_encoders[col]
-            # Handle unseen values
-            try:
-                X_categorical_encoded[col] = le.transform([str(input_data[col])])[0]
-            except ValueError:
-                # If value not seen during training, use most common class
-                X_categorical_encoded[col] = 0
-                st.warning(f"⚠️ Unknown value for {col}: {input_data[col]}. Using default encoding.")
-    
-    # Encode medication features
-    X_medications_encoded = X_medications.copy()
-    for col in medication_features:
-        if col in label_encoders:
-            le = label_encoders[col]
-            try:
-                X_medications_encoded[col] = le.transform([str(input_data[col])])[0]
-            except ValueError:
-                X_medications_encoded[col] = 0
-                st.warning(f"⚠️ Unknown value for {col}: {input_data[col]}. Using default encoding.")
-    
-    # Combine all features
-    X_combined = pd.concat([X_numeric, X_categorical_encoded, X_medications_encoded], axis=1)
-    
-    return X_combined
-
-def predict_cluster(X_processed, scaler, kmeans_model):
-    """Predict cluster for processed input"""
-    # Scale the input
-    X_scaled = scaler.transform(X_processed)
-    
-    # Predict cluster
-    cluster = kmeans_model.predict(X_scaled)[0]
-    
-    return cluster
+def predict_cluster(input_data, model):
+    """Predict cluster for user input, warning about unseen category values"""
+    response, unknown = model.predict_one(input_data, neighbors=0)
+    for _, col, value in unknown:
+        st.warning(f"⚠️ Unknown value for {col}: {value}. Using default encoding.")
+    return response['cluster']
 
 def display_cluster_result(cluster_id, cluster_profiles, feature_info):
     """Display cluster prediction result and characteristics"""
@@ -433,7 +367,9 @@ def main():
     
     # Load models
     with st.spinner("Loading models..."):
-        scaler, label_encoders, kmeans_model, feature_info, cluster_profiles = load_models()
+        model = load_models()
+        feature_info = model.feature_info
+        cluster_profiles = model.profiles
     
     # Load unique values for dropdowns
     unique_values = get_unique_values_from_data()
@@ -451,11 +387,8 @@ def main():
     if predict_button:
         try:
             with st.spinner("Processing your input and predicting cluster..."):
-                # Preprocess input
-                X_processed = preprocess_input(input_data, feature_info, label_encoders)
-                
-                # Predict cluster
-                cluster_id = predict_cluster(X_processed, scaler, kmeans_model)
+                # Preprocess input and predict cluster
+                cluster_id = predict_cluster(input_data, model)
                 
                 # Display result
                 st.markdown("---")
@@ -0,0 +1,72 @@
+"""
+Shared inference core for the cluster prediction entry points
+(Flask API, Vercel function and Streamlit dashboard).
+"""
+
+from .compact import (
+    COMPACT_MODEL_FILE,
+    compare_models,
+    export_compact,
+    load_compact,
+    model_from_compact,
+)
+from .core import (
+    ClusterModel,
+    DEFAULT_SIMILAR_PATIENTS,
+    MAX_SIMILAR_PATIENTS,
+    RequestError,
+    parse_neighbors,
+    shape_profile,
+    to_native,
+)
+from .drift import DriftMonitor, build_drift_reference
+from .loading import (
+    MODEL_BASE_URL,
+    MODEL_FILES,
+    DRIFT_REFERENCE_FILE,
+    NEIGHBOR_INDEX_FILE,
+    download_model,
+    ensure_models,
+    get_model,
+    get_registry,
+    load_model,
+    load_profile_aggregator,
+    load_variant,
+)
+from .neighbors import build_neighbor_index
+from .profiles import ProfileAggregator
+from .registry import DEFAULT_MODEL, FusedModels, ModelRegistry, variant_file
+
+__all__ = [
+    'COMPACT_MODEL_FILE',
+    'ClusterModel',
+    'DEFAULT_MODEL',
+    'DEFAULT_SIMILAR_PATIENTS',
+    'DRIFT_REFERENCE_FILE',
+    'DriftMonitor',
+    'FusedModels',
+    'MAX_SIMILAR_PATIENTS',
+    'MODEL_BASE_URL',
+    'MODEL_FILES',
+    'ModelRegistry',
+    'NEIGHBOR_INDEX_FILE',
+    'ProfileAggregator',
+    'RequestError',
+    'build_drift_reference',
+    'build_neighbor_index',
+    'compare_models',
+    'download_model',
+    'ensure_models',
+    'export_compact',
+    'get_model',
+    'get_registry',
+    'load_compact',
+    'load_model',
+    'load_profile_aggregator',
+    'load_variant',
+    'model_from_compact',
+    'parse_neighbors',
+    'shape_profile',
+    'to_native',
+    'variant_file',
+]
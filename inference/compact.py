@@ -0,0 +1,155 @@
+"""
+Compact model export for memory-constrained deploys
+
+Keeps only what inference needs, as flat arrays in one small pickle:
+  - centroids with the scaler folded in (raw feature space), as float32 or
+    int8 with a per-feature float32 step
+  - per-feature inverse scale and mean (mean is also the int8 offset)
+  - category code tables from the label encoders (class list per column;
+    the code is the list position and fits in uint8)
+  - a flat profile table (sizes, percentages, numeric means, readmission
+    distribution)
+
+The pickled sklearn objects carry fit-time state (labels_, n_iter_,
+feature_names_in_, LabelEncoder internals) that inference never reads.
+"""
+
+import pickle
+from pathlib import Path
+
+import numpy as np
+
+from .core import ClusterModel
+
+COMPACT_MODEL_FILE = 'model_compact.pkl'
+COMPACT_FORMAT = 'compact-v1'
+QUANTIZE_MODES = ('float32', 'int8')
+
+
+def export_compact(model, path, quantize='float32'):
+    """Write a ClusterModel as a compact model file; returns its size in bytes"""
+    if quantize not in QUANTIZE_MODES:
+        raise ValueError(f"quantize must be one of {QUANTIZE_MODES}, got {quantize!r}")
+
+    code_tables = {}
+    for col, table in model.code_tables.items():
+        if len(table) > 255:
+            raise ValueError(f"{col} has {len(table)} categories; uint8 codes allow 255")
+        code_tables[col] = sorted(table, key=table.get)
+
+    k = len(model.centroids)
+    readmission_labels = sorted({
+        label for p in model.profiles.values() for label in p.get('readmission_dist', {})
+    })
+    readmission_dist = np.zeros((k, len(readmission_labels)), dtype=np.float32)
+    profile_means = np.zeros((k, len(model.numeric_features)), dtype=np.float32)
+    profile_sizes = np.zeros(k, dtype=np.int32)
+    profile_percentages = np.zeros(k, dtype=np.float32)
+    for c, profile in model.profiles.items():
+        profile_sizes[c] = profile.get('size', 0)
+        profile_percentages[c] = profile.get('percentage', 0.0)
+        means = profile.get('numeric_means', {})
+        profile_means[c] = [means.get(f, 0.0) for f in model.numeric_features]
+        dist = profile.get('readmission_dist', {})
+        readmission_dist[c] = [dist.get(label, 0.0) for label in readmission_labels]
+
+    compact = {
+        'format': COMPACT_FORMAT,
+        'quantize': quantize,
+        'numeric_features': model.numeric_features,
+        'categorical_features': list(model.feature_info['categorical_features']),
+        'medication_features': list(model.feature_info['medication_features']),
+        'optimal_k': model.feature_info.get('optimal_k', k),
+        'code_tables': code_tables,
+        'mean': model.mean.astype(np.float32),
+        'inv_scale': (1.0 / model.scale).astype(np.float32),
+        'training_inertia': model.training_inertia,
+        'profile_sizes': profile_sizes,
+        'profile_percentages': profile_percentages,
+        'profile_means': profile_means,
+        'readmission_labels': readmission_labels,
+        'readmission_dist': readmission_dist
+    }
+
+    if quantize == 'float32':
+        compact['centroids'] = model.raw_centroids.astype(np.float32)
+    else:
+        # Symmetric per-feature int8 in scaled space, then fold the scale into the step
+        max_abs = np.abs(model.centroids).max(axis=0)
+        step = np.where(max_abs > 0, max_abs / 127.0, 1.0)
+        compact['centroids_q'] = np.round(model.centroids / step).astype(np.int8)
+        compact['centroid_step'] = (step * model.scale).astype(np.float32)
+
+    path = Path(path)
+    with open(path, 'wb') as f:
+        pickle.dump(compact, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return path.stat().st_size
+
+
+def model_from_compact(compact, **kwargs):
+    """Build a ClusterModel from a loaded compact dict"""
+    if compact.get('format') != COMPACT_FORMAT:
+        raise ValueError(f"Unsupported compact model format: {compact.get('format')!r}")
+
+    mean = compact['mean'].astype(np.float64)
+    inv_scale = compact['inv_scale'].astype(np.float64)
+    if compact['quantize'] == 'int8':
+        raw_centroids = compact['centroids_q'] * compact['centroid_step'].astype(np.float64) + mean
+    else:
+        raw_centroids = compact['centroids'].astype(np.float64)
+    centroids = (raw_centroids - mean) * inv_scale
+
+    numeric_features = compact['numeric_features']
+    labels = compact['readmission_labels']
+    cluster_profiles = {}
+    for c in range(len(centroids)):
+        cluster_profiles[c] = {
+            'size': int(compact['profile_sizes'][c]),
+            'percentage': float(compact['profile_percentages'][c]),
+            'numeric_means': dict(zip(numeric_features, compact['profile_means'][c].tolist())),
+            'readmission_dist': {
+                label: share
+                for label, share in zip(labels, compact['readmission_dist'][c].tolist())
+                if share > 0
+            }
+        }
+
+    feature_info = {
+        'numeric_features': numeric_features,
+        'categorical_features': compact['categorical_features'],
+        'medication_features': compact['medication_features'],
+        'optimal_k': compact['optimal_k']
+    }
+    code_tables = {
+        col: {label: code for code, label in enumerate(classes)}
+        for col, classes in compact['code_tables'].items()
+    }
+
+    return ClusterModel(
+        feature_info, code_tables, mean, 1.0 / inv_scale, centroids, cluster_profiles,
+        training_inertia=compact.get('training_inertia'), **kwargs
+    )
+
+
+def load_compact(path, **kwargs):
+    """Load a compact model file as a ClusterModel"""
+    with open(path, 'rb') as f:
+        compact = pickle.load(f)
+    return model_from_compact(compact, **kwargs)
+
+
+def compare_models(reference, candidate, X):
+    """
+    Parity of a candidate model against the reference on a raw feature matrix.
+
+    Returns cluster agreement and the worst absolute error in distance to
+    centroid and centroid margin.
+    """
+    ref_clusters, ref_distances, ref_margins = reference.assign(X)
+    clusters, distances, margins = candidate.assign(X)
+    return {
+        'n': int(len(X)),
+        'cluster_agreement': float(np.mean(ref_clusters == clusters)),
+        'max_distance_error': float(np.max(np.abs(ref_distances - distances))) if len(X) else 0.0,
+        'max_margin_error': float(np.max(np.abs(ref_margins - margins))) if len(X) else 0.0
+    }
@@ -0,0 +1,289 @@
+"""
+Preprocessing, prediction and response shaping shared by every entry point
+"""
+
+import os
+
+import numpy as np
+
+from .neighbors import query_neighbors
+
+DEFAULT_SIMILAR_PATIENTS = int(os.environ.get('SIMILAR_PATIENTS_K', 5))
+MAX_SIMILAR_PATIENTS = 50
+# Clusters scanned per "similar patients" query
+NEIGHBOR_PROBES = int(os.environ.get('NEIGHBOR_PROBES', 2))
+
+_NATIVE_TYPES = (str, int, float, bool, type(None))
+
+
+class RequestError(ValueError):
+    """Invalid client input (returned as HTTP 400)"""
+
+
+def parse_neighbors(value):
+    """Validate a request's 'neighbors' count; None means no lookup"""
+    if value is None:
+        return 0
+    message = f"'neighbors' must be a non-negative integer, got {value!r}"
+    if isinstance(value, bool) or isinstance(value, float) and not value.is_integer():
+        raise RequestError(message)
+    try:
+        k = int(value)
+    except (TypeError, ValueError):
+        raise RequestError(message)
+    if k < 0:
+        raise RequestError(message)
+    return k
+
+
+def to_native(value):
+    """Recursively convert numpy scalars/arrays to JSON-serializable Python types"""
+    if type(value) in _NATIVE_TYPES:
+        return value
+    if isinstance(value, dict):
+        return {to_native(k): to_native(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_native(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return float(value)
+    return value
+
+
+def shape_profile(profile):
+    """Convert one cluster_profiles entry to native types"""
+    shaped = to_native(profile)
+    if 'size' in shaped:
+        shaped['size'] = int(shaped['size'])
+    if 'percentage' in shaped:
+        shaped['percentage'] = float(shaped['percentage'])
+    return shaped
+
+
+def encode_records(records, numeric_features, encoded_features, code_tables):
+    """Encode input dicts into a raw feature matrix (see ClusterModel.encode)"""
+    features = numeric_features + encoded_features
+    n = len(records)
+    X = np.empty((n, len(features)), dtype=np.float64)
+    unknown = []
+
+    missing = [f for f in features if any(f not in r for r in records)]
+    if missing:
+        raise RequestError(f"Missing feature(s): {', '.join(missing)}")
+
+    for j, col in enumerate(numeric_features):
+        X[:, j] = [float(r[col]) for r in records]
+
+    offset = len(numeric_features)
+    for j, col in enumerate(encoded_features, start=offset):
+        table = code_tables.get(col)
+        if table is None:
+            X[:, j] = [float(r[col]) for r in records]
+            continue
+        for i, r in enumerate(records):
+            code = table.get(str(r[col]))
+            if code is None:
+                unknown.append((i, col, r[col]))
+                code = 0
+            X[i, j] = code
+
+    return X, unknown
+
+
+class ClusterModel:
+    """
+    Inference view of the notebook artifacts.
+
+    Label encoders are flattened into dict lookups and the scaler is folded
+    into the K-Means centroids once at load time, so a request only does
+    dict lookups and a single (n, k) distance computation on raw features.
+    Scaling is still applied when a consumer needs scaled rows (the
+    neighbor index and drift monitor).
+    """
+
+    def __init__(self, feature_info, code_tables, mean, scale, centroids,
+                 cluster_profiles, training_inertia=None, neighbor_index=None,
+                 profile_aggregator=None, drift_monitor=None):
+        self.feature_info = feature_info
+        self.code_tables = code_tables
+        self.cluster_profiles = cluster_profiles
+        self.training_inertia = training_inertia
+        self.neighbor_index = neighbor_index
+        self.profile_aggregator = profile_aggregator
+        self.drift_monitor = drift_monitor
+
+        self.numeric_features = list(feature_info['numeric_features'])
+        self.encoded_features = (
+            list(feature_info['categorical_features']) + list(feature_info['medication_features'])
+        )
+        self.features = self.numeric_features + self.encoded_features
+
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.centroids = np.asarray(centroids, dtype=np.float64)
+        self.centroid_sq_norms = np.einsum('ij,ij->i', self.centroids, self.centroids)
+
+        # Scaler folded into the centroids:
+        #   ||(x - mean) / scale - c||^2 = x^2 . w2 - 2 x . (c_raw * w2) + c_raw^2 . w2
+        # with w2 = 1 / scale^2 and c_raw = c * scale + mean
+        self.inv_scale_sq = 1.0 / self.scale ** 2
+        self.raw_centroids = self.centroids * self.scale + self.mean
+        self.folded_centroids = self.raw_centroids * self.inv_scale_sq
+        self.folded_offsets = self.raw_centroids ** 2 @ self.inv_scale_sq
+
+        self.profiles = {int(k): shape_profile(v) for k, v in cluster_profiles.items()}
+
+    @classmethod
+    def from_artifacts(cls, scaler, label_encoders, kmeans_model, feature_info,
+                       cluster_profiles, **kwargs):
+        """Build from the pickled notebook artifacts"""
+        encoded_features = (
+            list(feature_info['categorical_features']) + list(feature_info['medication_features'])
+        )
+        # Column -> {class string: code}; columns without an encoder pass through as numbers
+        code_tables = {
+            col: {str(label): code for code, label in enumerate(label_encoders[col].classes_)}
+            for col in encoded_features if col in label_encoders
+        }
+
+        centroids = np.asarray(kmeans_model.cluster_centers_, dtype=np.float64)
+        n_features = centroids.shape[1]
+        mean = getattr(scaler, 'mean_', None)
+        scale = getattr(scaler, 'scale_', None)
+        mean = np.zeros(n_features) if mean is None else mean
+        scale = np.ones(n_features) if scale is None else scale
+
+        return cls(
+            feature_info, code_tables, mean, scale, centroids, cluster_profiles,
+            training_inertia=getattr(kmeans_model, 'inertia_', None), **kwargs
+        )
+
+    def encode(self, records):
+        """
+        Encode a list of input dicts into the raw (unscaled) feature matrix.
+
+        Returns (X, unknown) where unknown lists (row, column, value) for
+        category values not seen during training; those are encoded as 0.
+        """
+        return encode_records(records, self.numeric_features, self.encoded_features, self.code_tables)
+
+    def scale_matrix(self, X):
+        """Apply the fitted StandardScaler"""
+        return (np.asarray(X, dtype=np.float64) - self.mean) / self.scale
+
+    def centroid_distances(self, X):
+        """
+        Squared scaled-space Euclidean distances from each raw row to every
+        centroid, shape (n, k), using the folded centroids (no scaling pass).
+        """
+        row_terms = (X * X) @ self.inv_scale_sq
+        d2 = row_terms[:, None] - 2.0 * (X @ self.folded_centroids.T) + self.folded_offsets
+        np.maximum(d2, 0.0, out=d2)
+        return d2
+
+    def predict_raw(self, X):
+        """Cluster ids for a raw (unscaled) feature matrix"""
+        return np.argmin(self.centroid_distances(X), axis=1)
+
+    def assign(self, X):
+        """
+        Cluster ids plus Euclidean distance to the assigned centroid and the
+        margin to the second-nearest one, all from a single distance pass
+        over the raw feature matrix.
+        """
+        d2 = self.centroid_distances(X)
+        clusters = np.argmin(d2, axis=1)
+        rows = np.arange(len(d2))
+        nearest = np.sqrt(d2[rows, clusters])
+        if d2.shape[1] > 1:
+            second = np.sqrt(np.partition(d2, 1, axis=1)[:, 1])
+        else:
+            second = nearest
+        return clusters, nearest, second - nearest
+
+    def similar_patients(self, X_scaled, k=DEFAULT_SIMILAR_PATIENTS):
+        """k most similar historical encounters per row (empty lists without an index)"""
+        index = self.neighbor_index
+        if index is None or k is None or int(k) <= 0:
+            return [[] for _ in range(len(X_scaled))]
+        k = min(int(k), MAX_SIMILAR_PATIENTS, len(index['encounter_ids']))
+        distances, indices = query_neighbors(index, X_scaled, k, NEIGHBOR_PROBES)
+        labels = index['readmitted_labels']
+        codes = index['readmitted_codes']
+        encounter_ids = index['encounter_ids']
+        return [
+            [
+                {
+                    'encounter_id': int(encounter_ids[i]),
+                    'readmitted': labels[codes[i]],
+                    'distance': float(d)
+                }
+                for d, i in zip(row_d, row_i)
+                if i >= 0
+            ]
+            for row_d, row_i in zip(distances, indices)
+        ]
+
+    def current_profiles(self):
+        """Cluster profiles to serve: live aggregator statistics if attached"""
+        if self.profile_aggregator is not None:
+            return self.profile_aggregator.profiles()
+        return self.profiles
+
+    def score_matrix(self, X, readmitted=None, need_scaled=False):
+        """
+        Assign a raw feature matrix, feeding any attached profile aggregator
+        and drift monitor (both work on the raw matrix). Returns (X_scaled,
+        clusters, distances, margins); X_scaled is None unless need_scaled.
+        """
+        clusters, distances, margins = self.assign(X)
+        X_scaled = self.scale_matrix(X) if need_scaled else None
+        if self.profile_aggregator is not None:
+            self.profile_aggregator.update(
+                clusters, X[:, :len(self.numeric_features)], readmitted
+            )
+        if self.drift_monitor is not None:
+            self.drift_monitor.update(X, clusters, distances, margins)
+        return X_scaled, clusters, distances, margins
+
+    def predict_records(self, records, neighbors=DEFAULT_SIMILAR_PATIENTS, readmitted=None):
+        """
+        Encode and predict a batch; returns (responses, unknown).
+
+        With a profile aggregator attached the batch is also added to the
+        running cluster statistics (with outcomes if readmitted is given).
+        """
+        X, unknown = self.encode(records)
+        use_neighbors = self.neighbor_index is not None and bool(neighbors)
+        X_scaled, clusters, distances, margins = self.score_matrix(
+            X, readmitted, need_scaled=use_neighbors
+        )
+        if use_neighbors:
+            similar = self.similar_patients(X_scaled, neighbors)
+        else:
+            similar = [[] for _ in range(len(X))]
+        responses = [
+            self.build_response(int(c), s, float(d), float(m))
+            for c, s, d, m in zip(clusters, similar, distances, margins)
+        ]
+        return responses, unknown
+
+    def predict_one(self, input_data, neighbors=DEFAULT_SIMILAR_PATIENTS):
+        """Predict a single input dict; returns (response, unknown)"""
+        responses, unknown = self.predict_records([input_data], neighbors)
+        return responses[0], unknown
+
+    def build_response(self, cluster_id, similar_patients=None,
+                       distance_to_centroid=None, centroid_margin=None):
+        """JSON-ready prediction payload"""
+        return {
+            'success': True,
+            'cluster': cluster_id,
+            'cluster_info': dict(self.current_profiles().get(cluster_id, {})),
+            'distance_to_centroid': distance_to_centroid,
+            'centroid_margin': centroid_margin,
+            'similar_patients': similar_patients or []
+        }
@@ -0,0 +1,184 @@
+"""
+Online drift monitoring for incoming patients
+
+Keeps exponentially decayed sketches of the scaled features (per-feature
+means, variances and fixed-bin histograms), the cluster mix and the
+centroid distances that prediction already computed, and compares them
+with training statistics.
+
+Statistics are kept on the raw (unscaled) feature matrix that prediction
+already built: the histogram bin edges are the scaled-space edges mapped
+through the fitted scaler (mean + edge * scale), and means and variances
+are converted to training-std units only when the report is made. Training
+data has mean 0 and standard deviation 1 in scaled space by construction,
+so mean shift and std ratio need no reference file. Histogram PSI and the
+training distance distribution come from the optional drift_reference.pkl
+exported by the notebook.
+"""
+
+import threading
+
+import numpy as np
+
+# Shared histogram bins in standard-deviation units (plus under/overflow bins)
+BIN_EDGES = np.linspace(-4.0, 4.0, 17)
+BIN_WIDTH = BIN_EDGES[1] - BIN_EDGES[0]
+N_BINS = len(BIN_EDGES) + 1
+
+DEFAULT_HALF_LIFE = 10000
+PSI_THRESHOLD = 0.2
+MEAN_SHIFT_THRESHOLD = 0.5
+
+
+def histogram_counts(X, bin_origin, inv_bin_width):
+    """
+    Counts per (feature, bin), shape (n_features, N_BINS). Bins are uniform
+    from bin_origin with width 1 / inv_bin_width (per feature), plus
+    under/overflow bins.
+    """
+    n_features = X.shape[1]
+    bins = np.floor((X - bin_origin) * inv_bin_width) + 1
+    bins = np.clip(bins, 0, N_BINS - 1).astype(np.int64)
+    flat = bins + np.arange(n_features) * N_BINS
+    return np.bincount(flat.ravel(), minlength=n_features * N_BINS).reshape(n_features, N_BINS)
+
+
+def feature_histograms(X_scaled):
+    """Counts per (feature, bin) for a scaled matrix, shape (n_features, N_BINS)"""
+    return histogram_counts(X_scaled, BIN_EDGES[0], 1.0 / BIN_WIDTH)
+
+
+def build_drift_reference(X_scaled, labels, centroids):
+    """Training statistics for the drift report (saved as drift_reference.pkl)"""
+    X_scaled = np.asarray(X_scaled, dtype=np.float64)
+    hist = feature_histograms(X_scaled).astype(np.float64)
+    nearest_d2 = np.einsum('ij,ij->i', X_scaled - centroids[labels], X_scaled - centroids[labels])
+    return {
+        'bin_edges': BIN_EDGES.copy(),
+        'feature_hist': hist / len(X_scaled),
+        'mean_sq_distance': float(nearest_d2.mean()),
+        'mean_distance': float(np.sqrt(nearest_d2).mean()),
+        'distance_p95': float(np.sqrt(np.percentile(nearest_d2, 95)))
+    }
+
+
+def psi(expected, observed, eps=1e-4):
+    """Population stability index between two normalised histograms"""
+    expected = np.clip(expected, eps, None)
+    observed = np.clip(observed, eps, None)
+    return float(np.sum((observed - expected) * np.log(observed / expected)))
+
+
+class DriftMonitor:
+    """
+    Exponentially decayed serving statistics.
+
+    Each update decays the existing sketch by 0.5 ** (n / half_life), so the
+    report reflects roughly the last `half_life` patients. Updates take the
+    raw feature matrix; mean and scale are the fitted scaler's parameters.
+    """
+
+    def __init__(self, features, n_clusters, training_shares=None,
+                 training_mean_sq_distance=None, reference=None,
+                 half_life=DEFAULT_HALF_LIFE, mean=None, scale=None):
+        self.features = list(features)
+        self.n_clusters = int(n_clusters)
+        self.training_shares = training_shares
+        self.reference = reference
+        self.training_mean_sq_distance = training_mean_sq_distance
+        if reference is not None:
+            self.training_mean_sq_distance = reference['mean_sq_distance']
+        self.decay = 0.5 ** (1.0 / half_life)
+
+        n_features = len(self.features)
+        self.mean = np.zeros(n_features) if mean is None else np.asarray(mean, dtype=np.float64)
+        self.scale = np.ones(n_features) if scale is None else np.asarray(scale, dtype=np.float64)
+        # Scaled-space bin edges mapped to raw units
+        self._bin_origin = self.mean + BIN_EDGES[0] * self.scale
+        self._inv_bin_width = 1.0 / (BIN_WIDTH * self.scale)
+        self.n_observed = 0
+        self.weight = 0.0
+        self.sum_x = np.zeros(n_features)
+        self.sum_x2 = np.zeros(n_features)
+        self.hist = np.zeros((n_features, N_BINS))
+        self.cluster_counts = np.zeros(self.n_clusters)
+        self.sum_d2 = 0.0
+        self.sum_distance = 0.0
+        self.sum_margin = 0.0
+        self._lock = threading.Lock()
+
+    def update(self, X, clusters, distances, margins):
+        """Add a raw batch; distances/margins are the ones returned with the prediction"""
+        n = len(X)
+        if n == 0:
+            return
+        hist = histogram_counts(X, self._bin_origin, self._inv_bin_width)
+        cluster_counts = np.bincount(clusters, minlength=self.n_clusters)
+        sum_x = X.sum(axis=0)
+        sum_x2 = np.einsum('ij,ij->j', X, X)
+        with self._lock:
+            f = self.decay ** n
+            self.n_observed += n
+            self.weight = self.weight * f + n
+            self.sum_x = self.sum_x * f + sum_x
+            self.sum_x2 = self.sum_x2 * f + sum_x2
+            self.hist = self.hist * f + hist
+            self.cluster_counts = self.cluster_counts * f + cluster_counts
+            self.sum_d2 = self.sum_d2 * f + float(np.dot(distances, distances))
+            self.sum_distance = self.sum_distance * f + float(distances.sum())
+            self.sum_margin = self.sum_margin * f + float(margins.sum())
+
+    def report(self):
+        """Compare serving statistics with training statistics"""
+        with self._lock:
+            w = self.weight
+            if w == 0:
+                return {'n_observed': 0, 'features': {}, 'clusters': {}, 'distance': {},
+                        'drifted_features': []}
+            # Raw moments to training-std units
+            raw_mean = self.sum_x / w
+            std = np.sqrt(np.maximum(self.sum_x2 / w - raw_mean ** 2, 0.0)) / self.scale
+            mean = (raw_mean - self.mean) / self.scale
+            hist = self.hist / w
+            cluster_shares = self.cluster_counts / w
+            mean_sq_distance = self.sum_d2 / w
+            mean_distance = self.sum_distance / w
+            mean_margin = self.sum_margin / w
+            n_observed = self.n_observed
+
+        features = {}
+        drifted = []
+        for j, name in enumerate(self.features):
+            entry = {'mean_shift': float(mean[j]), 'std_ratio': float(std[j])}
+            if self.reference is not None:
+                entry['psi'] = psi(self.reference['feature_hist'][j], hist[j])
+            features[name] = entry
+            if abs(entry['mean_shift']) > MEAN_SHIFT_THRESHOLD or entry.get('psi', 0.0) > PSI_THRESHOLD:
+                drifted.append(name)
+
+        clusters = {}
+        for c in range(self.n_clusters):
+            clusters[c] = {'observed_share': float(cluster_shares[c])}
+            if self.training_shares is not None:
+                clusters[c]['training_share'] = float(self.training_shares.get(c, 0.0))
+
+        distance = {
+            'mean_distance': float(mean_distance),
+            'mean_sq_distance': float(mean_sq_distance),
+            'mean_margin': float(mean_margin)
+        }
+        if self.training_mean_sq_distance:
+            distance['training_mean_sq_distance'] = float(self.training_mean_sq_distance)
+            distance['sq_distance_ratio'] = float(mean_sq_distance / self.training_mean_sq_distance)
+        if self.reference is not None:
+            distance['training_mean_distance'] = self.reference['mean_distance']
+            distance['training_distance_p95'] = self.reference['distance_p95']
+
+        return {
+            'n_observed': n_observed,
+            'effective_sample_size': float(w),
+            'features': features,
+            'clusters': clusters,
+            'distance': distance,
+            'drifted_features': drifted
+        }
@@ -0,0 +1,228 @@
+"""
+Model artifact download, loading and caching
+"""
+
+import atexit
+import os
+import pickle
+import tempfile
+import urllib.request
+from pathlib import Path
+
+from .compact import COMPACT_MODEL_FILE, load_compact
+from .core import ClusterModel
+from .drift import DriftMonitor
+from .profiles import ProfileAggregator
+from .registry import DEFAULT_MODEL, ModelRegistry, variant_file
+
+# Configuration
+MODEL_BASE_URL = os.environ.get(
+    'MODEL_BASE_URL',
+    'https://github.com/likhitha281/DiabetesHospitalReadmission/releases/download/v1.0.0-models/'
+)
+
+MODEL_FILES = [
+    'scaler.pkl',
+    'label_encoders.pkl',
+    'kmeans_model.pkl',
+    'feature_info.pkl',
+    'cluster_profiles.pkl'
+]
+
+# 'full' serves the pickled sklearn artifacts; 'compact' serves model_compact.pkl only
+MODEL_FORMAT = os.environ.get('MODEL_FORMAT', 'full')
+
+# Optional artifacts (older releases don't ship them)
+NEIGHBOR_INDEX_FILE = 'neighbor_index.pkl'
+DRIFT_REFERENCE_FILE = 'drift_reference.pkl'
+
+# Optional: keep cluster_profiles current from the live /predict stream
+PROFILE_SNAPSHOT_PATH = os.environ.get('PROFILE_SNAPSHOT_PATH')
+PROFILE_SNAPSHOT_SECONDS = float(os.environ.get('PROFILE_SNAPSHOT_SECONDS', 300))
+
+# Extra variants served by name alongside the default model (model_compact_<name>.pkl)
+MODEL_VARIANTS = [v.strip() for v in os.environ.get('MODEL_VARIANTS', '').split(',') if v.strip()]
+MODEL_REGISTRY_MAX_MB = float(os.environ.get('MODEL_REGISTRY_MAX_MB', 200))
+MODEL_REGISTRY_MAX_MODELS = int(os.environ.get('MODEL_REGISTRY_MAX_MODELS', 8))
+
+# Global cache
+_model_cache = None
+_registry = None
+_models_dir = None
+
+
+def download_model(url, dest_path):
+    """Download a model file"""
+    try:
+        urllib.request.urlretrieve(url, dest_path)
+        return True
+    except Exception as e:
+        print(f"Error downloading {url}: {e}")
+        return False
+
+
+def ensure_models(model_files=None):
+    """Ensure the model files are available in the temp models directory"""
+    global _models_dir
+
+    if _models_dir is None:
+        _models_dir = Path(tempfile.gettempdir()) / 'diabetes_models'
+        _models_dir.mkdir(exist_ok=True)
+
+    for model_file in (MODEL_FILES if model_files is None else model_files):
+        local_path = _models_dir / model_file
+        if not local_path.exists():
+            url = f"{MODEL_BASE_URL}{model_file}"
+            if not download_model(url, local_path):
+                raise Exception(f"Failed to download: {model_file}")
+
+    return _models_dir
+
+
+def ensure_optional_file(models_dir, model_file):
+    """Download an optional artifact; returns its path or None"""
+    local_path = Path(models_dir) / model_file
+    if not local_path.exists():
+        url = f"{MODEL_BASE_URL}{model_file}"
+        if not download_model(url, local_path):
+            return None
+    return local_path
+
+
+def load_artifacts(models_dir):
+    """Load the raw pickled artifacts from a models directory"""
+    models_dir = Path(models_dir)
+    artifacts = []
+    for model_file in MODEL_FILES:
+        with open(models_dir / model_file, 'rb') as f:
+            artifacts.append(pickle.load(f))
+    return tuple(artifacts)
+
+
+def load_optional_file(path):
+    """Load an optional artifact, returning None if it is missing or unreadable"""
+    if path is None or not Path(path).exists():
+        return None
+    try:
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    except Exception as e:
+        print(f"Optional model file {path} unavailable: {e}")
+        return None
+
+
+def optional_path(models_dir, model_file, download):
+    """Local path of an optional artifact, downloading it first if requested"""
+    if download:
+        return ensure_optional_file(models_dir, model_file)
+    return Path(models_dir) / model_file
+
+
+def load_model(models_dir, download=False, neighbors=True, drift=False, model_format='full'):
+    """Build a ClusterModel from a models directory (full artifacts or compact file)"""
+    neighbor_index = None
+    if neighbors:
+        neighbor_index = load_optional_file(optional_path(models_dir, NEIGHBOR_INDEX_FILE, download))
+
+    try:
+        if model_format == 'compact':
+            model = load_compact(Path(models_dir) / COMPACT_MODEL_FILE, neighbor_index=neighbor_index)
+        else:
+            scaler, label_encoders, kmeans_model, feature_info, cluster_profiles = load_artifacts(models_dir)
+            model = ClusterModel.from_artifacts(
+                scaler, label_encoders, kmeans_model, feature_info, cluster_profiles,
+                neighbor_index=neighbor_index
+            )
+    except FileNotFoundError:
+        raise
+    except Exception as e:
+        raise Exception(f"Error loading models: {str(e)}")
+
+    if drift:
+        reference = load_optional_file(optional_path(models_dir, DRIFT_REFERENCE_FILE, download))
+        model.drift_monitor = build_drift_monitor(model, reference)
+
+    return model
+
+
+def build_drift_monitor(model, reference=None):
+    """Drift monitor with training cluster shares and inertia from the model artifacts"""
+    total = sum(p.get('size', 0) for p in model.profiles.values())
+    training_shares = {c: p.get('percentage', 0.0) / 100 for c, p in model.profiles.items()}
+    inertia = model.training_inertia
+    training_mean_sq_distance = inertia / total if inertia is not None and total else None
+    return DriftMonitor(
+        model.features, len(model.centroids),
+        training_shares=training_shares,
+        training_mean_sq_distance=training_mean_sq_distance,
+        reference=reference,
+        mean=model.mean,
+        scale=model.scale
+    )
+
+
+def profiles_match(cluster_profiles, model):
+    """Whether saved profiles have the model's clusters and numeric features"""
+    if {int(c) for c in cluster_profiles} != set(range(len(model.centroids))):
+        return False
+    return all(
+        set(profile.get('numeric_means', {})) == set(model.numeric_features)
+        for profile in cluster_profiles.values()
+    )
+
+
+def load_profile_aggregator(model, snapshot_path, snapshot_interval=PROFILE_SNAPSHOT_SECONDS):
+    """
+    Profile aggregator seeded from the last snapshot, or the model's profiles
+    if there is no snapshot or it was written for a different model (e.g.
+    before a re-export with another k)
+    """
+    snapshot_path = Path(snapshot_path)
+    cluster_profiles = model.cluster_profiles
+    if snapshot_path.exists():
+        with open(snapshot_path, 'rb') as f:
+            snapshot = pickle.load(f)
+        if profiles_match(snapshot, model):
+            cluster_profiles = snapshot
+        else:
+            print(f"Ignoring profile snapshot {snapshot_path}: clusters or features don't match the model")
+    return ProfileAggregator.from_profiles(
+        cluster_profiles, model.numeric_features, len(model.centroids),
+        snapshot_path=snapshot_path, snapshot_interval=snapshot_interval
+    )
+
+
+def get_model():
+    """Get the served model (downloaded from MODEL_BASE_URL) with caching"""
+    global _model_cache
+    if _model_cache is None:
+        if MODEL_FORMAT == 'compact':
+            models_dir = ensure_models([COMPACT_MODEL_FILE])
+        else:
+            models_dir = ensure_models()
+        model = load_model(models_dir, download=True, drift=True, model_format=MODEL_FORMAT)
+        if PROFILE_SNAPSHOT_PATH:
+            model.profile_aggregator = load_profile_aggregator(model, PROFILE_SNAPSHOT_PATH)
+            atexit.register(model.profile_aggregator.snapshot)
+        _model_cache = model
+    return _model_cache
+
+
+def load_variant(name):
+    """Load a named model variant; 'default' is the served model from get_model()"""
+    if name == DEFAULT_MODEL:
+        return get_model()
+    models_dir = ensure_models([variant_file(name)])
+    return load_compact(models_dir / variant_file(name))
+
+
+def get_registry():
+    """Get the model registry (variants from MODEL_VARIANTS) with caching"""
+    global _registry
+    if _registry is None:
+        _registry = ModelRegistry(
+            load_variant, MODEL_VARIANTS,
+            max_bytes=MODEL_REGISTRY_MAX_MB * 1024 * 1024,
+            max_models=MODEL_REGISTRY_MAX_MODELS
+        )
+    return _registry
@@ -0,0 +1,115 @@
+"""
+Inverted-file (IVF) nearest-neighbor index for "similar patients"
+
+Training rows are grouped by their K-Means cluster and stored contiguously,
+so a query only scans the rows of its nearest `n_probe` clusters. Vectors
+are kept feature-major (one contiguous column per row) as float32, or int8
+with a per-feature step, together with their squared norms; a cluster scan
+is then one matrix-vector product.
+
+A KD-tree over the 26 dense scaled features degenerates to a near
+brute-force scan and its pickle is several times the size of the raw data.
+"""
+
+import numpy as np
+
+IVF_FORMAT = 'ivf-v1'
+VECTOR_DTYPES = ('float32', 'int8')
+
+# Rows per chunk when scanning a cluster for a batch of queries
+QUERY_CHUNK = 256
+
+
+def build_neighbor_index(X_scaled, labels, centroids, encounter_ids, readmitted,
+                         dtype='float32'):
+    """
+    Build an IVF index over the scaled training matrix.
+
+    labels/centroids are the K-Means partition (no extra fit); readmitted
+    outcomes are stored as uint8 codes.
+    """
+    if dtype not in VECTOR_DTYPES:
+        raise ValueError(f"dtype must be one of {VECTOR_DTYPES}, got {dtype!r}")
+
+    X_scaled = np.asarray(X_scaled, dtype=np.float64)
+    labels = np.asarray(labels)
+    centroids = np.asarray(centroids, dtype=np.float64)
+    order = np.argsort(labels, kind='stable')
+    offsets = np.searchsorted(labels[order], np.arange(len(centroids) + 1))
+    vectors = X_scaled[order]
+
+    index = {
+        'format': IVF_FORMAT,
+        'centroids': centroids.astype(np.float32),
+        'offsets': offsets.astype(np.int64),
+        'encounter_ids': np.asarray(encounter_ids, dtype=np.int64)[order],
+    }
+    if dtype == 'int8':
+        max_abs = np.abs(vectors).max(axis=0)
+        step = np.where(max_abs > 0, max_abs / 127.0, 1.0)
+        quantized = np.round(vectors / step).astype(np.int8)
+        index['vectors'] = np.ascontiguousarray(quantized.T)
+        index['step'] = step.astype(np.float32)
+        vectors = quantized * step
+    else:
+        index['vectors'] = np.ascontiguousarray(vectors.T, dtype=np.float32)
+        vectors = index['vectors'].T.astype(np.float64)
+    index['sq_norms'] = np.einsum('ij,ij->i', vectors, vectors).astype(np.float32)
+
+    readmitted_cat = np.unique(np.asarray(readmitted).astype(str), return_inverse=True)
+    index['readmitted_labels'] = [str(label) for label in readmitted_cat[0]]
+    index['readmitted_codes'] = readmitted_cat[1].astype(np.uint8)[order]
+    return index
+
+
+def index_nbytes(index):
+    """Resident size of an index's arrays"""
+    return sum(v.nbytes for v in index.values() if isinstance(v, np.ndarray))
+
+
+def query_neighbors(index, X_scaled, k, n_probe=2):
+    """
+    k nearest indexed rows for each query row, scanning the rows of the
+    n_probe nearest clusters. Returns (distances, positions), shape (n, k);
+    positions index the index's arrays, and missing slots (clusters with
+    fewer than k rows) have distance inf and position -1.
+    """
+    X_scaled = np.asarray(X_scaled, dtype=np.float64)
+    centroids = index['centroids']
+    offsets = index['offsets']
+    vectors = index['vectors']
+    sq_norms = index['sq_norms']
+    n, n_probe = len(X_scaled), min(n_probe, len(centroids))
+
+    Q = X_scaled.astype(np.float32)
+    if 'step' in index:
+        # (q * step) . v_int8 == q . (v_int8 * step)
+        Q_dot = Q * index['step']
+    else:
+        Q_dot = Q
+    coarse = (Q * Q).sum(axis=1)[:, None] - 2.0 * Q @ centroids.T + (centroids * centroids).sum(axis=1)
+    probes = np.argsort(coarse, axis=1)[:, :n_probe]
+
+    cand_d2 = np.full((n, n_probe * k), np.inf, dtype=np.float32)
+    cand_pos = np.full((n, n_probe * k), -1, dtype=np.int64)
+    for cluster in np.unique(probes):
+        start, stop = offsets[cluster], offsets[cluster + 1]
+        if stop == start:
+            continue
+        block = vectors[:, start:stop]
+        rows, slot = np.nonzero(probes == cluster)
+        take = min(k, stop - start)
+        for c in range(0, len(rows), QUERY_CHUNK):
+            r, s = rows[c:c + QUERY_CHUNK], slot[c:c + QUERY_CHUNK]
+            # Squared distance up to the per-query |q|^2 term
+            d2 = sq_norms[start:stop] - 2.0 * (Q_dot[r] @ block)
+            top = np.argpartition(d2, take - 1, axis=1)[:, :take]
+            cols = s[:, None] * k + np.arange(take)
+            cand_d2[r[:, None], cols] = np.take_along_axis(d2, top, axis=1)
+            cand_pos[r[:, None], cols] = top + start
+
+    k = min(k, cand_d2.shape[1])
+    best = np.argsort(cand_d2, axis=1)[:, :k]
+    d2 = np.take_along_axis(cand_d2, best, axis=1) + (Q * Q).sum(axis=1)[:, None]
+    distances = np.sqrt(np.maximum(d2, 0.0))
+    return distances, np.take_along_axis(cand_pos, best, axis=1)
@@ -0,0 +1,171 @@
+"""
+Incremental cluster profile statistics
+
+Keeps running counts and sums per cluster so `cluster_profiles` (size,
+percentage, numeric_means, readmission_dist) can be updated from new
+encounters without re-running the notebook.
+"""
+
+import os
+import pickle
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from .core import shape_profile
+
+
+class ProfileAggregator:
+    """
+    Running per-cluster statistics.
+
+    Live predictions carry no outcome, so they update size and numeric means
+    only; scored batches with a `readmitted` column also update the
+    readmission distribution. Snapshots are written in the same dict layout
+    as cluster_profiles.pkl plus an 'outcome_count' per cluster, so the
+    distribution can be resumed exactly; served profiles() leave it out.
+    """
+
+    def __init__(self, numeric_features, n_clusters, snapshot_path=None,
+                 snapshot_interval=300.0):
+        self.numeric_features = list(numeric_features)
+        self.n_clusters = int(n_clusters)
+        self.counts = np.zeros(self.n_clusters, dtype=np.float64)
+        self.sums = np.zeros((self.n_clusters, len(self.numeric_features)), dtype=np.float64)
+        self.outcome_labels = []
+        self.outcome_counts = np.zeros((self.n_clusters, 0), dtype=np.float64)
+
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else None
+        self.snapshot_interval = float(snapshot_interval)
+        self._last_snapshot = time.monotonic()
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._profiles = None
+
+    @classmethod
+    def from_profiles(cls, cluster_profiles, numeric_features, n_clusters, **kwargs):
+        """
+        Seed the running totals from an existing cluster_profiles dict.
+
+        n_clusters comes from the model; profiles for clusters outside
+        range(n_clusters) raise ValueError.
+        """
+        agg = cls(numeric_features, n_clusters, **kwargs)
+        for cluster_id, profile in cluster_profiles.items():
+            c = int(cluster_id)
+            if not 0 <= c < agg.n_clusters:
+                raise ValueError(f"Profile for cluster {c} but the model has {agg.n_clusters} clusters")
+            size = float(profile.get('size', 0))
+            agg.counts[c] = size
+            means = profile.get('numeric_means', {})
+            agg.sums[c] = [float(means.get(f, 0.0)) * size for f in agg.numeric_features]
+            dist = profile.get('readmission_dist', {})
+            outcome_count = float(profile.get('outcome_count', size))
+            for label, share in dist.items():
+                j = agg._outcome_column(str(label))
+                agg.outcome_counts[c, j] += float(share) * outcome_count
+        return agg
+
+    def _outcome_column(self, label):
+        """Column for an outcome label, growing the table for unseen labels"""
+        try:
+            return self.outcome_labels.index(label)
+        except ValueError:
+            self.outcome_labels.append(label)
+            self.outcome_counts = np.hstack(
+                [self.outcome_counts, np.zeros((self.n_clusters, 1))]
+            )
+            return len(self.outcome_labels) - 1
+
+    def update(self, clusters, X_numeric, readmitted=None):
+        """
+        Add a batch of scored encounters.
+
+        clusters: (n,) cluster ids; X_numeric: (n, n_numeric) raw numeric
+        features in numeric_features order; readmitted: optional (n,) labels.
+        """
+        clusters = np.asarray(clusters, dtype=np.int64)
+        X_numeric = np.asarray(X_numeric, dtype=np.float64)
+        with self._lock:
+            self.counts += np.bincount(clusters, minlength=self.n_clusters)
+            np.add.at(self.sums, clusters, X_numeric)
+            if readmitted is not None:
+                labels, codes = np.unique(np.asarray(readmitted).astype(str), return_inverse=True)
+                columns = np.array([self._outcome_column(label) for label in labels])
+                np.add.at(self.outcome_counts, (clusters, columns[codes.ravel()]), 1.0)
+            self._profiles = None
+            self._dirty = True
+        self.maybe_snapshot()
+
+    def profiles(self):
+        """Current statistics in the cluster_profiles layout (native types)"""
+        with self._lock:
+            if self._profiles is None:
+                self._profiles = self._build_profiles()
+            return self._profiles
+
+    def snapshot_profiles(self):
+        """profiles() plus each cluster's 'outcome_count', so a snapshot resumes exactly"""
+        with self._lock:
+            if self._profiles is None:
+                self._profiles = self._build_profiles()
+            outcome_totals = self.outcome_counts.sum(axis=1)
+            return {
+                c: dict(profile, outcome_count=int(round(outcome_totals[c])))
+                for c, profile in self._profiles.items()
+            }
+
+    def _build_profiles(self):
+        total = self.counts.sum()
+        outcome_totals = self.outcome_counts.sum(axis=1)
+        profiles = {}
+        for c in range(self.n_clusters):
+            size = self.counts[c]
+            means = self.sums[c] / size if size else np.zeros(len(self.numeric_features))
+            outcome_total = outcome_totals[c]
+            if outcome_total:
+                dist = {
+                    label: self.outcome_counts[c, j] / outcome_total
+                    for j, label in enumerate(self.outcome_labels)
+                    if self.outcome_counts[c, j] > 0
+                }
+            else:
+                dist = {}
+            profiles[c] = shape_profile({
+                'size': int(round(size)),
+                'percentage': size / total * 100 if total else 0.0,
+                'numeric_means': dict(zip(self.numeric_features, means)),
+                'readmission_dist': dist
+            })
+        return profiles
+
+    def snapshot(self, path=None):
+        """Atomically write the current profiles to a pickle file"""
+        path = Path(path) if path else self.snapshot_path
+        if path is None:
+            return None
+        profiles = self.snapshot_profiles()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(profiles, f)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._last_snapshot = time.monotonic()
+            self._dirty = False
+        return path
+
+    def maybe_snapshot(self):
+        """Snapshot if there are new updates and the interval has elapsed"""
+        if self.snapshot_path is None or not self._dirty:
+            return None
+        if time.monotonic() - self._last_snapshot < self.snapshot_interval:
+            return None
+        try:
+            return self.snapshot()
+        except Exception as e:
+            print(f"Error writing profile snapshot: {e}")
+            return None
@@ -0,0 +1,254 @@
+"""
+Registry of model variants (different k / feature sets)
+
+Variants are compact model files (model_compact_<name>.pkl) loaded lazily on
+first use and kept in an LRU cache under a memory budget. The primary model
+is always available as 'default'.
+
+score_all scores records against several variants in one pass: every
+variant's folded centroids are embedded in a shared feature space and
+stacked, so all distances come from one (n, sum of k) matrix product.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .core import RequestError, encode_records
+from .neighbors import index_nbytes
+
+DEFAULT_MODEL = 'default'
+
+
+def variant_file(name):
+    """Release asset name for a variant"""
+    return f'model_compact_{name}.pkl'
+
+
+def model_nbytes(model):
+    """Approximate resident size of a ClusterModel's arrays and neighbor index"""
+    total = sum(
+        getattr(model, attr).nbytes
+        for attr in ('mean', 'scale', 'centroids', 'raw_centroids',
+                     'folded_centroids', 'folded_offsets', 'inv_scale_sq')
+    )
+    total += sum(len(table) * 64 for table in model.code_tables.values())
+    index = model.neighbor_index
+    if index is not None:
+        total += index_nbytes(index)
+    return total
+
+
+class FusedModels:
+    """
+    Several ClusterModels stacked for a single vectorized distance pass.
+
+    Columns are the union of the variants' features. A variant's missing
+    features get zero weight, so they don't contribute to its distances.
+    Variants whose code tables disagree with the shared encoding are
+    scored separately.
+    """
+
+    def __init__(self, names, models):
+        code_tables = {}
+        fused, separate = [], []
+        for name, model in zip(names, models):
+            if any(code_tables.get(col, table) != table for col, table in model.code_tables.items()):
+                separate.append((name, model))
+                continue
+            fused.append((name, model))
+            code_tables.update(model.code_tables)
+
+        self.numeric_features = list(dict.fromkeys(
+            f for _, model in fused for f in model.numeric_features
+        ))
+        self.encoded_features = list(dict.fromkeys(
+            f for _, model in fused for f in model.encoded_features
+        ))
+        self.features = self.numeric_features + self.encoded_features
+        self.code_tables = code_tables
+        self.fused = fused
+        self.separate = separate
+
+        column = {f: j for j, f in enumerate(self.features)}
+        n_variants = len(fused)
+        self.k_max = max((len(m.centroids) for _, m in fused), default=0)
+        self.inv_scale_sq = np.zeros((n_variants, len(self.features)))
+        self.folded_centroids = np.zeros((n_variants * self.k_max, len(self.features)))
+        # Padding centroids never win the argmin
+        self.folded_offsets = np.full(n_variants * self.k_max, np.inf)
+        for v, (_, model) in enumerate(fused):
+            cols = [column[f] for f in model.features]
+            k = len(model.centroids)
+            rows = slice(v * self.k_max, v * self.k_max + k)
+            self.inv_scale_sq[v, cols] = model.inv_scale_sq
+            self.folded_centroids[rows, cols] = model.folded_centroids
+            self.folded_offsets[rows] = model.folded_offsets
+
+    def encode(self, records):
+        """Encode records once into the shared feature space"""
+        return encode_records(records, self.numeric_features, self.encoded_features, self.code_tables)
+
+    def assign(self, X):
+        """Per-variant (clusters, distances, margins) from one distance pass"""
+        n, n_variants = len(X), len(self.fused)
+        row_terms = (X * X) @ self.inv_scale_sq.T
+        cross = X @ self.folded_centroids.T
+        d2 = (
+            np.repeat(row_terms, self.k_max, axis=1) - 2.0 * cross + self.folded_offsets
+        ).reshape(n, n_variants, self.k_max)
+        np.maximum(d2, 0.0, out=d2)
+        clusters = np.argmin(d2, axis=2)
+        nearest = np.sqrt(np.take_along_axis(d2, clusters[:, :, None], axis=2)[:, :, 0])
+        if self.k_max > 1:
+            second = np.sqrt(np.partition(d2, 1, axis=2)[:, :, 1])
+            margins = np.where(np.isinf(second), 0.0, second - nearest)
+        else:
+            margins = np.zeros_like(nearest)
+        return {
+            name: (clusters[:, v], nearest[:, v], margins[:, v])
+            for v, (name, _) in enumerate(self.fused)
+        }
+
+
+def score_fused(fused, records):
+    """{name: (clusters, distances, margins)} for every variant in a FusedModels"""
+    results = {}
+    if fused.fused:
+        X, _ = fused.encode(records)
+        results.update(fused.assign(X))
+    for name, model in fused.separate:
+        X, _ = model.encode(records)
+        results[name] = model.assign(X)
+    return results
+
+
+class ModelRegistry:
+    """
+    Lazily loaded model variants with LRU eviction.
+
+    loader(name) returns a ClusterModel. The 'default' model is pinned and
+    never evicted; other variants are evicted least-recently-used first once
+    the loaded total exceeds max_bytes or max_models.
+    """
+
+    def __init__(self, loader, variants, max_bytes=200 * 1024 * 1024, max_models=8):
+        self.loader = loader
+        self.variants = [DEFAULT_MODEL] + [v for v in variants if v != DEFAULT_MODEL]
+        self.max_bytes = int(max_bytes)
+        self.max_models = int(max_models)
+        self._models = OrderedDict()
+        self._sizes = {}
+        self._fused = None
+        self._lock = threading.RLock()
+
+    def get(self, name=None):
+        """Model for a variant name, loading (and evicting) as needed"""
+        name = name or DEFAULT_MODEL
+        if name not in self.variants:
+            raise RequestError(f"Unknown model '{name}'. Available: {', '.join(self.variants)}")
+        with self._lock:
+            if name in self._models:
+                self._models.move_to_end(name)
+                return self._models[name]
+
+        model = self.loader(name)
+        with self._lock:
+            if name not in self._models:
+                self._models[name] = model
+                self._sizes[name] = model_nbytes(model)
+                self._fused = None
+                self._evict(keep=name)
+            self._models.move_to_end(name)
+            return self._models[name]
+
+    def _evict(self, keep):
+        """Drop least recently used variants until within budget"""
+        for name in list(self._models):
+            if self.loaded_bytes() <= self.max_bytes and len(self._models) <= self.max_models:
+                break
+            if name in (keep, DEFAULT_MODEL):
+                continue
+            del self._models[name]
+            del self._sizes[name]
+            self._fused = None
+
+    def loaded(self):
+        """Names of currently loaded variants, least recently used first"""
+        with self._lock:
+            return list(self._models)
+
+    def loaded_bytes(self):
+        """Estimated bytes held by loaded variants"""
+        return sum(self._sizes.values())
+
+    def status(self):
+        """Registry summary for the /models endpoint"""
+        with self._lock:
+            return {
+                'variants': self.variants,
+                'loaded': {name: self._sizes[name] for name in self._models},
+                'loaded_bytes': self.loaded_bytes(),
+                'max_bytes': self.max_bytes,
+                'max_models': self.max_models
+            }
+
+    def resolve(self, models):
+        """Variant names for a request's `models` value: 'all', 'loaded' or a list"""
+        if models == 'all':
+            return list(self.variants)
+        if models == 'loaded':
+            return self.loaded() or [DEFAULT_MODEL]
+        if isinstance(models, str):
+            names = [models]
+        elif isinstance(models, list) and all(isinstance(name, str) for name in models):
+            names = list(dict.fromkeys(models))
+        else:
+            raise RequestError(
+                f"'models' must be 'all', 'loaded', a model name or a list of names, got {models!r}"
+            )
+        unknown = [name for name in names if name not in self.variants]
+        if unknown:
+            raise RequestError(f"Unknown model(s): {', '.join(unknown)}")
+        return names
+
+    def fused(self, names):
+        """FusedModels for the given variants (cached for the loaded set)"""
+        models = [self.get(name) for name in names]
+        with self._lock:
+            key = tuple(names)
+            if self._fused is not None and self._fused[0] == key:
+                return self._fused[1]
+            fused = FusedModels(names, models)
+            # Don't let the cache pin variants that were evicted while loading the rest
+            if all(self._models.get(name) is model for name, model in zip(names, models)):
+                self._fused = (key, fused)
+            return fused
+
+    def score_all(self, records, names=None):
+        """
+        Score records against several variants (default: all loaded).
+
+        Returns {name: (clusters, distances, margins)} with one array entry
+        per record.
+        """
+        if names is None:
+            names = self.loaded() or [DEFAULT_MODEL]
+        return score_fused(self.fused(list(names)), records)
+
+    def predict_all(self, input_data, models='loaded'):
+        """JSON-ready comparison of one input dict across variants"""
+        names = self.resolve(models)
+        fused = self.fused(names)
+        results = score_fused(fused, [input_data])
+        loaded = dict(fused.fused + fused.separate)
+        response = {'success': True, 'models': {}}
+        for name in names:
+            model = loaded[name]
+            clusters, distances, margins = results[name]
+            payload = model.build_response(int(clusters[0]), None, float(distances[0]), float(margins[0]))
+            del payload['success'], payload['similar_patients']
+            payload['k'] = len(model.centroids)
+            response['models'][name] = payload
+        return response
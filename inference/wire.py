@@ -0,0 +1,139 @@
+"""
+Compact binary wire format for high-volume prediction clients
+
+A fixed-layout, column-major alternative to the JSON body, negotiated by
+Content-Type / Accept. Numeric features travel as float32 and categorical /
+medication features as uint8 codes from the label encoders (see
+ClusterModel code tables, exposed by wire_schema), so decoding is two
+np.frombuffer views straight into the inference matrix.
+
+Request (little-endian):
+    magic   4s      b'DHR1'
+    n_rows  uint32
+    n_num   uint16  number of numeric columns (must match the model)
+    n_code  uint16  number of coded columns (must match the model)
+    numeric float32[n_num][n_rows]
+    codes   uint8[n_code][n_rows]   (UNKNOWN_CODE for unseen values)
+
+Response:
+    magic     4s      b'DHRR'
+    n_rows    uint32
+    clusters  uint8[n_rows]
+    distance  float32[n_rows]   distance to assigned centroid
+    margin    float32[n_rows]   margin to second-nearest centroid
+"""
+
+import struct
+
+import numpy as np
+
+CONTENT_TYPE = 'application/x-cluster-features'
+
+REQUEST_MAGIC = b'DHR1'
+RESPONSE_MAGIC = b'DHRR'
+REQUEST_HEADER = struct.Struct('<4sIHH')
+RESPONSE_HEADER = struct.Struct('<4sI')
+
+# Code sent for category values the client could not map
+UNKNOWN_CODE = 255
+
+
+class WireFormatError(ValueError):
+    """Malformed binary request or response"""
+
+
+def wire_schema(model):
+    """Column order and code tables a client needs to build binary requests"""
+    return {
+        'content_type': CONTENT_TYPE,
+        'numeric_features': model.numeric_features,
+        'coded_features': model.encoded_features,
+        'code_tables': {
+            col: sorted(table, key=table.get) for col, table in model.code_tables.items()
+        },
+        'unknown_code': UNKNOWN_CODE
+    }
+
+
+def encode_request(numeric, codes):
+    """
+    Pack a batch into the binary request layout.
+
+    numeric: (n, n_num) numbers; codes: (n, n_code) integer codes.
+    """
+    numeric = np.asarray(numeric, dtype='<f4')
+    codes = np.asarray(codes, dtype=np.uint8)
+    n_rows = numeric.shape[0]
+    if codes.shape[0] != n_rows:
+        raise WireFormatError("numeric and codes must have the same number of rows")
+    header = REQUEST_HEADER.pack(REQUEST_MAGIC, n_rows, numeric.shape[1], codes.shape[1])
+    return b''.join([header, numeric.T.tobytes(), codes.T.tobytes()])
+
+
+def records_to_request(records, model):
+    """Client-side helper: encode input dicts and pack them as a binary request"""
+    X, _ = model.encode(records)
+    n_num = len(model.numeric_features)
+    return encode_request(X[:, :n_num], X[:, n_num:])
+
+
+def decode_request(body, model):
+    """
+    Decode a binary request into the raw (unscaled) feature matrix.
+
+    Returns (X, n_unknown); unknown or out-of-range codes are encoded as 0,
+    matching the JSON path's fallback for unseen category values.
+    """
+    if len(body) < REQUEST_HEADER.size:
+        raise WireFormatError("Request too short")
+    magic, n_rows, n_num, n_code = REQUEST_HEADER.unpack_from(body)
+    if magic != REQUEST_MAGIC:
+        raise WireFormatError("Bad magic; expected DHR1")
+    if n_num != len(model.numeric_features) or n_code != len(model.encoded_features):
+        raise WireFormatError(
+            f"Expected {len(model.numeric_features)} numeric and "
+            f"{len(model.encoded_features)} coded columns, got {n_num} and {n_code}"
+        )
+    expected = REQUEST_HEADER.size + n_rows * (4 * n_num + n_code)
+    if len(body) != expected:
+        raise WireFormatError(f"Expected {expected} bytes, got {len(body)}")
+
+    offset = REQUEST_HEADER.size
+    numeric = np.frombuffer(body, dtype='<f4', count=n_rows * n_num, offset=offset)
+    offset += 4 * n_rows * n_num
+    codes = np.frombuffer(body, dtype=np.uint8, count=n_rows * n_code, offset=offset)
+
+    X = np.empty((n_rows, n_num + n_code), dtype=np.float64)
+    X[:, :n_num] = numeric.reshape(n_num, n_rows).T
+    codes = codes.reshape(n_code, n_rows).T
+    sizes = np.array([
+        len(model.code_tables.get(col, ())) or 256 for col in model.encoded_features
+    ])
+    valid = codes < sizes
+    X[:, n_num:] = np.where(valid, codes, 0)
+    return X, int((~valid).sum())
+
+
+def encode_response(clusters, distances, margins):
+    """Pack predictions into the binary response layout"""
+    n_rows = len(clusters)
+    return b''.join([
+        RESPONSE_HEADER.pack(RESPONSE_MAGIC, n_rows),
+        np.asarray(clusters, dtype=np.uint8).tobytes(),
+        np.asarray(distances, dtype='<f4').tobytes(),
+        np.asarray(margins, dtype='<f4').tobytes()
+    ])
+
+
+def decode_response(body):
+    """Unpack a binary response into (clusters, distances, margins) arrays"""
+    magic, n_rows = RESPONSE_HEADER.unpack_from(body)
+    if magic != RESPONSE_MAGIC:
+        raise WireFormatError("Bad magic; expected DHRR")
+    offset = RESPONSE_HEADER.size
+    clusters = np.frombuffer(body, dtype=np.uint8, count=n_rows, offset=offset)
+    offset += n_rows
+    distances = np.frombuffer(body, dtype='<f4', count=n_rows, offset=offset)
+    offset += 4 * n_rows
+    margins = np.frombuffer(body, dtype='<f4', count=n_rows, offset=offset)
+    return clusters, distances, margins
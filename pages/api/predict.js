@@ -2,13 +2,43 @@
  * Next.js API Route - Proxy to Railway Python API
  * 
  * This route proxies requests to the Railway-deployed Python API.
+ * Bodies are forwarded as raw bytes with their Content-Type, so JSON is not
+ * re-serialized and the compact binary format (application/x-cluster-features)
+ * passes through unchanged.
  */
 
+// Forward the raw request body instead of parsing it
+export const config = {
+  api: {
+    bodyParser: false,
+  },
+};
+
+// Vercel rejects function request bodies over 4.5 MB; fail early with a clear
+// message (large binary or JSON batches should go to the Python API directly)
+const MAX_BODY_BYTES = 4500000;
+
+class BodyTooLargeError extends Error {}
+
+async function readRawBody(req) {
+  const chunks = [];
+  let size = 0;
+  for await (const chunk of req) {
+    const buffer = typeof chunk === 'string' ? Buffer.from(chunk) : chunk;
+    size += buffer.length;
+    if (size > MAX_BODY_BYTES) {
+      throw new BodyTooLargeError();
+    }
+    chunks.push(buffer);
+  }
+  return Buffer.concat(chunks);
+}
+
 export default async function handler(req, res) {
   // Set CORS headers
   res.setHeader('Access-Control-Allow-Origin', '*');
   res.setHeader('Access-Control-Allow-Methods', 'POST, OPTIONS');
-  res.setHeader('Access-Control-Allow-Headers', 'Content-Type');
+  res.setHeader('Access-Control-Allow-Headers', 'Content-Type, Accept');
 
   // Handle OPTIONS request
   if (req.method === 'OPTIONS') {
@@ -41,14 +71,27 @@ export default async function handler(req, res) {
     });
   }
 
+  const tooLarge = {
+    error: 'Request body too large',
+    message: `The proxy accepts at most ${MAX_BODY_BYTES.toLocaleString()} bytes. ` +
+      'Split the batch or POST it to the Python API directly.'
+  };
+  if (Number(req.headers['content-length']) > MAX_BODY_BYTES) {
+    return res.status(413).json(tooLarge);
+  }
+
   try {
     // Proxy request to Railway API
-    const railwayResponse = await fetch(`${railwayApiUrl}/predict`, {
+    const body = await readRawBody(req);
+    // Keep the query string (e.g. ?model=k5 for binary requests)
+    const query = req.url.includes('?') ? req.url.slice(req.url.indexOf('?')) : '';
+    const railwayResponse = await fetch(`${railwayApiUrl}/predict${query}`, {
       method: 'POST',
       headers: {
-        'Content-Type': 'application/json',
+        'Content-Type': req.headers['content-type'] || 'application/json',
+        'Accept': req.headers['accept'] || 'application/json',
       },
-      body: JSON.stringify(req.body),
+      body,
       // Add timeout
       signal: AbortSignal.timeout(30000) // 30 second timeout
     });
@@ -62,10 +105,15 @@ export default async function handler(req, res) {
       });
     }
 
-    const data = await railwayResponse.json();
-    return res.status(200).json(data);
+    const contentType = railwayResponse.headers.get('content-type') || 'application/json';
+    const data = Buffer.from(await railwayResponse.arrayBuffer());
+    res.setHeader('Content-Type', contentType);
+    return res.status(200).send(data);
     
   } catch (error) {
+    if (error instanceof BodyTooLargeError) {
+      return res.status(413).json(tooLarge);
+    }
     console.error('Error calling Railway API:', error);
     
     // More specific error messages
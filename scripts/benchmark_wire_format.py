@@ -0,0 +1,92 @@
+"""
+Benchmark JSON vs the compact binary request format
+
+For each batch size, reports payload size and the server-side time to turn
+the body into the NumPy inference matrix. JSON is the /predict batch body
+{"records": [...]} (json.loads + encode); binary is decode_request. Records
+are synthetic, drawn from the model's code tables.
+
+Bodies over the Vercel proxy's request limit (PROXY_BODY_LIMIT) are marked;
+send those to the Python API directly.
+
+Usage:
+    python scripts/benchmark_wire_format.py --models-dir models
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from inference import load_model
+from inference import wire
+
+# Vercel's request body limit for pages/api/predict.js
+PROXY_BODY_LIMIT = 4_500_000
+
+
+def synthetic_records(model, n, seed=0):
+    """Random input dicts in the /predict JSON layout"""
+    rng = np.random.default_rng(seed)
+    columns = {f: rng.integers(0, 20, n).tolist() for f in model.numeric_features}
+    for col in model.encoded_features:
+        classes = sorted(model.code_tables[col], key=model.code_tables[col].get)
+        columns[col] = [classes[i] for i in rng.integers(0, len(classes), n)]
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+
+def best_time(fn, repeat):
+    """Fastest of `repeat` runs, in seconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--models-dir', default='models')
+    parser.add_argument('--sizes', default='1,1000,100000')
+    args = parser.parse_args()
+
+    model = load_model(args.models_dir, neighbors=False)
+
+    print(f"{'batch':>8} | {'JSON bytes':>12} {'binary bytes':>13} {'ratio':>6} | "
+          f"{'JSON parse':>11} {'binary parse':>13} {'speedup':>8}")
+    print("-" * 84)
+    over_limit = False
+    for n in (int(s) for s in args.sizes.split(',')):
+        records = synthetic_records(model, n)
+        json_body = json.dumps({'records': records}).encode()
+        binary_body = wire.records_to_request(records, model)
+
+        # Both paths must produce the same matrix
+        X_json, _ = model.encode(json.loads(json_body)['records'])
+        X_binary, _ = wire.decode_request(binary_body, model)
+        assert np.allclose(X_json, X_binary)
+
+        repeat = 200 if n <= 1000 else 5
+        json_time = best_time(lambda: model.encode(json.loads(json_body)['records']), repeat)
+        binary_time = best_time(lambda: wire.decode_request(binary_body, model), repeat)
+
+        print(f"{n:>8,} | {len(json_body):>12,} {len(binary_body):>13,} "
+              f"{len(json_body) / len(binary_body):>5.1f}x | "
+              f"{json_time * 1e3:>9.3f}ms {binary_time * 1e3:>11.3f}ms "
+              f"{json_time / binary_time:>7.1f}x"
+              f"{' *' if len(binary_body) > PROXY_BODY_LIMIT else ''}")
+        over_limit = over_limit or len(binary_body) > PROXY_BODY_LIMIT
+
+    if over_limit:
+        print(f"\n* Both bodies exceed the {PROXY_BODY_LIMIT / 1e6:.1f} MB Vercel proxy limit; "
+              f"POST them to the Python API directly or split the batch")
+
+
+if __name__ == '__main__':
+    main()
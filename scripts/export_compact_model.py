@@ -0,0 +1,70 @@
+"""
+Export the compact model and check parity with the full model
+
+Writes models/model_compact.pkl (float32 or int8 centroids with the scaler
+folded in, uint8 code tables, flat profile table). With --holdout it also
+compares cluster assignments and distances with the full sklearn artifacts
+on encounters the model was not trained on.
+
+Usage:
+    python scripts/export_compact_model.py --quantize int8 \
+        --holdout new_encounters.csv
+"""
+
+import argparse
+import os
+import sys
+import timeit
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from inference import MODEL_FILES, compare_models, export_compact, load_compact, load_model
+from inference.compact import QUANTIZE_MODES
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--models-dir', default='models')
+    parser.add_argument('--out', default=None, help='Default: <models-dir>/model_compact.pkl')
+    parser.add_argument('--quantize', choices=QUANTIZE_MODES, default='float32')
+    parser.add_argument('--holdout', default=None,
+                        help='CSV of held-out encounters for the parity check (not the training data)')
+    parser.add_argument('--sample', type=int, default=20000)
+    args = parser.parse_args()
+    if args.holdout is not None and not os.path.exists(args.holdout):
+        parser.error(f"held-out file {args.holdout} not found")
+
+    models_dir = Path(args.models_dir)
+    out = Path(args.out) if args.out else models_dir / 'model_compact.pkl'
+
+    full = load_model(models_dir, neighbors=False)
+    size = export_compact(full, out, quantize=args.quantize)
+    full_size = sum((models_dir / f).stat().st_size for f in MODEL_FILES)
+    print(f"✅ Saved {args.quantize} compact model to {out}")
+    print(f"   Size: {size / 1024:.1f} KB (full artifacts: {full_size / 1024:.1f} KB)")
+
+    load_us = min(timeit.repeat(lambda: load_compact(out), number=100, repeat=5)) / 100 * 1e6
+    print(f"   Load time: {load_us:.0f} µs")
+
+    if args.holdout is None:
+        print("   No --holdout CSV given; skipping parity check")
+        return
+
+    df = pd.read_csv(args.holdout, keep_default_na=False, na_values=[''])
+    df = df.dropna(subset=full.features)
+    if len(df) > args.sample:
+        df = df.sample(args.sample, random_state=42)
+    X, _ = full.encode(df[full.features].to_dict('records'))
+
+    parity = compare_models(full, load_compact(out), X)
+    print(f"\nParity on {parity['n']:,} held-out encounters:")
+    print(f"   Cluster agreement: {parity['cluster_agreement'] * 100:.3f}%")
+    print(f"   Max distance error: {parity['max_distance_error']:.2e}")
+    print(f"   Max margin error: {parity['max_margin_error']:.2e}")
+
+
+if __name__ == '__main__':
+    main()
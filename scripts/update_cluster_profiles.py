@@ -0,0 +1,58 @@
+"""
+Update cluster profiles from a batch of new encounters
+
+Scores the encounters in a CSV (same columns as data/diabetic_data.csv) and
+folds them into the running cluster statistics, then writes a snapshot in
+the cluster_profiles.pkl layout.
+
+Usage:
+    python scripts/update_cluster_profiles.py new_encounters.csv \
+        --models-dir models --snapshot models/cluster_profiles_live.pkl
+"""
+
+import argparse
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from inference import load_model, load_profile_aggregator
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('csv', help='CSV of new encounters')
+    parser.add_argument('--models-dir', default='models')
+    parser.add_argument('--snapshot', default='models/cluster_profiles_live.pkl',
+                        help='Snapshot to resume from and overwrite')
+    parser.add_argument('--chunksize', type=int, default=50000)
+    args = parser.parse_args()
+
+    model = load_model(args.models_dir, neighbors=False)
+    aggregator = load_profile_aggregator(model, args.snapshot)
+    model.profile_aggregator = aggregator
+
+    total = 0
+    # Keep literal 'None' values (e.g. max_glu_serum) as categories, not NaN
+    reader = pd.read_csv(args.csv, chunksize=args.chunksize, keep_default_na=False, na_values=[''])
+    for chunk in reader:
+        chunk = chunk.dropna(subset=model.features)
+        if chunk.empty:
+            continue
+        readmitted = chunk['readmitted'].to_numpy() if 'readmitted' in chunk.columns else None
+        X, _ = model.encode(chunk[model.features].to_dict('records'))
+        # score_matrix feeds the aggregator; no per-row responses needed
+        model.score_matrix(X, readmitted)
+        total += len(chunk)
+        print(f"Processed {total:,} encounters")
+
+    path = aggregator.snapshot()
+    print(f"✅ Saved updated cluster profiles to {path}")
+    for cluster_id, profile in aggregator.profiles().items():
+        print(f"  Cluster {cluster_id}: {profile['size']:,} patients ({profile['percentage']:.2f}%)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+"""
+Shared fixtures: model artifacts built from tests/fixtures/encounters.csv
+
+The artifacts are fitted the way the notebook's save cell fits them
+(LabelEncoder per category column on str values, StandardScaler, K-Means)
+and written to a temporary models directory, so the tests don't depend on
+pickles from a particular scikit-learn version.
+"""
+
+import pickle
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.cluster import KMeans
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from inference import build_drift_reference, build_neighbor_index
+from inference import loading
+
+FIXTURES_DIR = Path(__file__).resolve().parent / 'fixtures'
+
+NUMERIC_FEATURES = [
+    'time_in_hospital', 'num_lab_procedures', 'num_procedures', 'num_medications',
+    'number_outpatient', 'number_emergency', 'number_inpatient', 'number_diagnoses'
+]
+CATEGORICAL_FEATURES = [
+    'race', 'gender', 'age', 'admission_type_id', 'discharge_disposition_id',
+    'admission_source_id', 'max_glu_serum', 'A1Cresult', 'diabetesMed'
+]
+MEDICATION_FEATURES = [
+    'metformin', 'repaglinide', 'nateglinide', 'glimepiride', 'glipizide',
+    'glyburide', 'pioglitazone', 'rosiglitazone', 'insulin'
+]
+FEATURES = NUMERIC_FEATURES + CATEGORICAL_FEATURES + MEDICATION_FEATURES
+
+UNSEEN_VALUES = [
+    {'race': 'Martian'},
+    {'insulin': 'Sideways'},
+    {'age': '[100-110)', 'A1Cresult': '>12', 'admission_type_id': 99},
+]
+
+
+@pytest.fixture(scope='session')
+def encounters():
+    """Fixture encounters ('None' is a category value, not missing)"""
+    return pd.read_csv(FIXTURES_DIR / 'encounters.csv', keep_default_na=False, na_values=[''])
+
+
+@pytest.fixture(scope='session')
+def artifacts(encounters, tmp_path_factory):
+    """Fitted artifacts and the models directory they were saved to"""
+    label_encoders = {}
+    X = encounters[NUMERIC_FEATURES].copy()
+    for col in CATEGORICAL_FEATURES + MEDICATION_FEATURES:
+        le = LabelEncoder()
+        X[col] = le.fit_transform(encounters[col].astype(str))
+        label_encoders[col] = le
+
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+    kmeans = KMeans(n_clusters=4, random_state=42, n_init=10).fit(X_scaled)
+
+    feature_info = {
+        'numeric_features': NUMERIC_FEATURES,
+        'categorical_features': CATEGORICAL_FEATURES,
+        'medication_features': MEDICATION_FEATURES,
+        'optimal_k': 4
+    }
+    cluster_profiles = {}
+    for cluster_id in range(4):
+        cluster_data = encounters[kmeans.labels_ == cluster_id]
+        cluster_profiles[cluster_id] = {
+            'size': len(cluster_data),
+            'percentage': len(cluster_data) / len(encounters) * 100,
+            'numeric_means': cluster_data[NUMERIC_FEATURES].mean().to_dict(),
+            'readmission_dist': cluster_data['readmitted'].value_counts(normalize=True).to_dict()
+        }
+
+    models_dir = tmp_path_factory.mktemp('models')
+    saved = {
+        'scaler.pkl': scaler,
+        'label_encoders.pkl': label_encoders,
+        'kmeans_model.pkl': kmeans,
+        'feature_info.pkl': feature_info,
+        'cluster_profiles.pkl': cluster_profiles,
+        'neighbor_index.pkl': build_neighbor_index(
+            X_scaled, kmeans.labels_, kmeans.cluster_centers_,
+            encounters['encounter_id'], encounters['readmitted']
+        ),
+        'drift_reference.pkl': build_drift_reference(X_scaled, kmeans.labels_, kmeans.cluster_centers_)
+    }
+    for name, obj in saved.items():
+        with open(models_dir / name, 'wb') as f:
+            pickle.dump(obj, f)
+
+    return {
+        'models_dir': models_dir,
+        'scaler': scaler,
+        'label_encoders': label_encoders,
+        'kmeans': kmeans,
+        'feature_info': feature_info,
+        'X_scaled': X_scaled
+    }
+
+
+@pytest.fixture
+def served_models(artifacts, monkeypatch):
+    """Point the served-model loader at the fixture artifacts (no downloads)"""
+    monkeypatch.setattr(loading, '_models_dir', artifacts['models_dir'])
+    monkeypatch.setattr(loading, '_model_cache', None)
+    monkeypatch.setattr(loading, '_registry', None)
+    monkeypatch.setattr(loading, 'MODEL_FORMAT', 'full')
+    monkeypatch.setattr(loading, 'MODEL_VARIANTS', [])
+    monkeypatch.setattr(loading, 'PROFILE_SNAPSHOT_PATH', None)
+    monkeypatch.delenv('MODEL_BASE_URL', raising=False)
+    return artifacts
+
+
+@pytest.fixture(scope='session')
+def baseline_cluster(artifacts):
+    """
+    cluster(input_data) from the original entry-point code path: DataFrame
+    preprocessing with LabelEncoder.transform (unseen values encoded as 0),
+    then scaler.transform and kmeans.predict.
+    """
+    feature_info = artifacts['feature_info']
+
+    def cluster(input_data):
+        df_input = pd.DataFrame([input_data])
+        X = df_input[feature_info['numeric_features']].copy()
+        for col in feature_info['categorical_features'] + feature_info['medication_features']:
+            le = artifacts['label_encoders'][col]
+            try:
+                X[col] = le.transform([str(input_data[col])])[0]
+            except ValueError:
+                X[col] = 0
+        X_scaled = artifacts['scaler'].transform(X)
+        return int(artifacts['kmeans'].predict(X_scaled)[0])
+
+    return cluster
+
+
+@pytest.fixture
+def records(encounters):
+    """
+    A spread of fixture rows, as the JSON-native dicts a client would send,
+    plus rows with unseen category values
+    """
+    rows = [
+        {f: (row[f].item() if isinstance(row[f], np.generic) else row[f]) for f in FEATURES}
+        for _, row in encounters.iloc[::5].iterrows()
+    ]
+    for i, overrides in enumerate(UNSEEN_VALUES):
+        rows.append({**rows[i], **overrides})
+    return rows
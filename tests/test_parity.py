@@ -0,0 +1,150 @@
+"""
+Entry-point parity: app.py, api/predict.handler and
+cluster_dashboard.predict_cluster must assign the same cluster as the
+original scaler.transform + kmeans.predict path.
+"""
+
+import json
+import pickle
+
+import pytest
+
+from inference import RequestError, load_model
+from inference import loading
+from inference.compact import COMPACT_FORMAT
+
+class FakeRequest:
+    """Minimal stand-in for the Vercel request object"""
+
+    def __init__(self, body, method='POST'):
+        self.method = method
+        self.body = json.dumps(body)
+
+
+@pytest.fixture
+def client(served_models):
+    from app import app
+    app.config['TESTING'] = True
+    return app.test_client()
+
+
+@pytest.fixture
+def handler(served_models):
+    from api.predict import handler
+    return handler
+
+
+@pytest.fixture
+def dashboard():
+    pytest.importorskip('streamlit')
+    import cluster_dashboard
+    return cluster_dashboard
+
+
+@pytest.fixture
+def dashboard_warnings(dashboard, monkeypatch):
+    """Messages passed to st.warning by the dashboard"""
+    warnings = []
+    monkeypatch.setattr(dashboard.st, 'warning', warnings.append)
+    return warnings
+
+
+def test_flask_matches_baseline(client, records, baseline_cluster):
+    for record in records:
+        resp = client.post('/predict', json={'data': record, 'neighbors': 0})
+        assert resp.status_code == 200, resp.get_json()
+        assert resp.get_json()['cluster'] == baseline_cluster(record)
+
+
+def test_records_cover_every_cluster(records, baseline_cluster):
+    assert {baseline_cluster(r) for r in records} == set(range(4))
+
+
+def test_flask_batch_matches_baseline(client, records, baseline_cluster):
+    resp = client.post('/predict', json={'records': records})
+    assert resp.status_code == 200, resp.get_json()
+    assert resp.get_json()['clusters'] == [baseline_cluster(r) for r in records]
+
+
+def test_handler_matches_baseline(handler, records, baseline_cluster):
+    for record in records:
+        result = handler(FakeRequest({'data': record}))
+        assert result['statusCode'] == 200, result['body']
+        assert json.loads(result['body'])['cluster'] == baseline_cluster(record)
+
+
+def test_dashboard_matches_baseline(dashboard, dashboard_warnings, records, artifacts,
+                                    baseline_cluster):
+    model = load_model(artifacts['models_dir'], neighbors=False)
+    for record in records:
+        assert dashboard.predict_cluster(record, model) == baseline_cluster(record)
+
+
+def test_dashboard_warns_on_unseen_values(dashboard, dashboard_warnings, records, artifacts):
+    model = load_model(artifacts['models_dir'], neighbors=False)
+    dashboard.predict_cluster({**records[0], 'race': 'Martian'}, model)
+    assert len(dashboard_warnings) == 1
+    assert 'race' in dashboard_warnings[0] and 'Martian' in dashboard_warnings[0]
+
+
+def test_similar_patients_returned(client, records):
+    resp = client.post('/predict', json={'data': records[0], 'neighbors': 3})
+    assert resp.status_code == 200, resp.get_json()
+    similar = resp.get_json()['similar_patients']
+    assert len(similar) == 3
+    assert [p['distance'] for p in similar] == sorted(p['distance'] for p in similar)
+
+
+@pytest.mark.parametrize('missing', ['time_in_hospital', 'race', 'insulin'])
+def test_missing_feature(missing, client, handler, dashboard, dashboard_warnings, records, artifacts,
+                         baseline_cluster):
+    record = {k: v for k, v in records[0].items() if k != missing}
+
+    with pytest.raises(KeyError):
+        baseline_cluster(record)
+
+    resp = client.post('/predict', json={'data': record})
+    assert resp.status_code == 400
+    assert resp.get_json()['error'] == 'Invalid request'
+
+    resp = client.post('/predict', json={'records': [records[1], record]})
+    assert resp.status_code == 400
+
+    result = handler(FakeRequest({'data': record}))
+    assert result['statusCode'] == 400
+    assert json.loads(result['body'])['error'] == 'Invalid request'
+
+    model = load_model(artifacts['models_dir'], neighbors=False)
+    with pytest.raises(RequestError):
+        dashboard.predict_cluster(record, model)
+
+
+@pytest.mark.parametrize('neighbors', [-1, 2.5, 'many', True])
+def test_invalid_neighbors(neighbors, client, handler, records):
+    resp = client.post('/predict', json={'data': records[0], 'neighbors': neighbors})
+    assert resp.status_code == 400
+
+    result = handler(FakeRequest({'data': records[0], 'neighbors': neighbors}))
+    assert result['statusCode'] == 400
+
+
+def test_unknown_model(client, handler, records):
+    resp = client.post('/predict', json={'data': records[0], 'model': 'nope'})
+    assert resp.status_code == 400
+    assert resp.get_json()['error'] == 'Invalid request'
+
+    result = handler(FakeRequest({'data': records[0], 'models': ['default', 'nope']}))
+    assert result['statusCode'] == 400
+
+
+def test_internal_key_error_is_server_error(client, handler, records, served_models, monkeypatch):
+    # A variant file missing one of its arrays is our fault, not the client's
+    with open(served_models['models_dir'] / 'model_compact_broken.pkl', 'wb') as f:
+        pickle.dump({'format': COMPACT_FORMAT, 'quantize': 'float32'}, f)
+    monkeypatch.setattr(loading, 'MODEL_VARIANTS', ['broken'])
+
+    resp = client.post('/predict', json={'data': records[0], 'model': 'broken'})
+    assert resp.status_code == 500
+
+    result = handler(FakeRequest({'data': records[0], 'model': 'broken'}))
+    assert result['statusCode'] == 500
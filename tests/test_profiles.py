@@ -0,0 +1,93 @@
+"""
+Running cluster profiles: snapshot resume and model mismatches
+"""
+
+import pickle
+
+import numpy as np
+import pytest
+
+from inference import load_model, load_profile_aggregator
+
+
+def test_stale_snapshot_is_ignored(artifacts, tmp_path, capsys):
+    # A snapshot from an export with a different k
+    model = load_model(artifacts['models_dir'], neighbors=False)
+    stale = {c: model.cluster_profiles[c] for c in range(3)}
+    snapshot_path = tmp_path / 'profiles_live.pkl'
+    with open(snapshot_path, 'wb') as f:
+        pickle.dump(stale, f)
+
+    agg = load_profile_aggregator(model, snapshot_path)
+    assert 'Ignoring profile snapshot' in capsys.readouterr().out
+    assert agg.n_clusters == len(model.centroids)
+    assert [p['size'] for p in agg.profiles().values()] == [
+        model.cluster_profiles[c]['size'] for c in range(4)
+    ]
+
+    # Every cluster of the model can be updated
+    X_numeric = np.ones((4, len(model.numeric_features)))
+    agg.update(np.arange(4), X_numeric)
+    assert agg.counts.sum() == sum(p['size'] for p in model.cluster_profiles.values()) + 4
+
+
+def test_snapshot_with_other_features_is_ignored(artifacts, tmp_path):
+    model = load_model(artifacts['models_dir'], neighbors=False)
+    stale = {
+        c: dict(profile, numeric_means={'time_in_hospital': 1.0})
+        for c, profile in model.cluster_profiles.items()
+    }
+    snapshot_path = tmp_path / 'profiles_live.pkl'
+    with open(snapshot_path, 'wb') as f:
+        pickle.dump(stale, f)
+
+    agg = load_profile_aggregator(model, snapshot_path)
+    assert agg.profiles()[0]['numeric_means'] == {
+        f: float(v) for f, v in model.cluster_profiles[0]['numeric_means'].items()
+    }
+
+
+def assert_same_profiles(actual, expected):
+    assert list(actual) == list(expected)
+    for c, profile in expected.items():
+        assert actual[c]['size'] == profile['size']
+        assert actual[c]['percentage'] == pytest.approx(profile['percentage'])
+        assert actual[c]['numeric_means'] == pytest.approx(profile['numeric_means'])
+        assert actual[c]['readmission_dist'] == pytest.approx(profile['readmission_dist'])
+
+
+def fed_aggregator(model, encounters, tmp_path):
+    """Aggregator seeded from the model's profiles and fed the fixture encounters with outcomes"""
+    agg = load_profile_aggregator(model, tmp_path / 'profiles_live.pkl')
+    X, _ = model.encode(encounters[model.features].to_dict('records'))
+    clusters, _, _ = model.assign(X)
+    agg.update(clusters[:200], X[:200, :len(model.numeric_features)], encounters['readmitted'][:200])
+    # Live predictions carry no outcome
+    agg.update(clusters[200:], X[200:, :len(model.numeric_features)])
+    return agg
+
+
+def test_snapshot_round_trip(artifacts, encounters, tmp_path):
+    model = load_model(artifacts['models_dir'], neighbors=False)
+    agg = fed_aggregator(model, encounters, tmp_path)
+    path = agg.snapshot()
+
+    resumed = load_profile_aggregator(model, path)
+    assert_same_profiles(resumed.profiles(), agg.profiles())
+    assert all('outcome_count' not in profile for profile in resumed.profiles().values())
+    np.testing.assert_allclose(resumed.outcome_counts.sum(axis=1), agg.outcome_counts.sum(axis=1))
+
+
+def test_resumed_aggregator_continues_exactly(artifacts, encounters, tmp_path):
+    # Snapshot, resume, then add the same batch to both: the outcome
+    # distribution only stays exact if outcome_count was carried over
+    model = load_model(artifacts['models_dir'], neighbors=False)
+    agg = fed_aggregator(model, encounters, tmp_path)
+    resumed = load_profile_aggregator(model, agg.snapshot())
+
+    X, _ = model.encode(encounters[model.features].iloc[:50].to_dict('records'))
+    clusters, _, _ = model.assign(X)
+    batch = (clusters, X[:, :len(model.numeric_features)], encounters['readmitted'][:50])
+    agg.update(*batch)
+    resumed.update(*batch)
+    assert_same_profiles(resumed.profiles(), agg.profiles())
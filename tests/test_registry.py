@@ -0,0 +1,146 @@
+"""
+Model registry: LRU eviction, request resolution and fused scoring
+"""
+
+import numpy as np
+import pytest
+from sklearn.cluster import KMeans
+
+from inference import (
+    DEFAULT_MODEL, ClusterModel, ModelRegistry, RequestError,
+    export_compact, load_compact, load_model, variant_file
+)
+
+
+@pytest.fixture(scope='session')
+def variants_dir(artifacts, tmp_path_factory):
+    """
+    Compact variant files fitted like the notebook's variant export: other
+    k values, a no-medications feature set, and one whose race codes
+    disagree with the default model's (so it can't be fused)
+    """
+    full = load_model(artifacts['models_dir'], neighbors=False)
+    X_scaled = artifacts['X_scaled']
+    scaler = artifacts['scaler']
+    numeric = artifacts['feature_info']['numeric_features']
+    categorical = artifacts['feature_info']['categorical_features']
+    meds = artifacts['feature_info']['medication_features']
+    n_no_meds = len(numeric) + len(categorical)
+    specs = {
+        'k3': (3, meds, X_scaled.shape[1]),
+        'k5': (5, meds, X_scaled.shape[1]),
+        'no_meds': (4, [], n_no_meds),
+        'recoded': (3, meds, X_scaled.shape[1]),
+    }
+
+    out = tmp_path_factory.mktemp('variants')
+    for name, (k, variant_meds, n_features) in specs.items():
+        kmeans = KMeans(n_clusters=k, random_state=42, n_init=10).fit(X_scaled[:, :n_features])
+        code_tables = {
+            col: table for col, table in full.code_tables.items()
+            if col in categorical + variant_meds
+        }
+        if name == 'recoded':
+            race = code_tables['race']
+            code_tables['race'] = {value: len(race) - 1 - code for value, code in race.items()}
+        feature_info = {
+            'numeric_features': numeric,
+            'categorical_features': categorical,
+            'medication_features': variant_meds,
+            'optimal_k': k
+        }
+        profiles = {
+            c: {'size': int((kmeans.labels_ == c).sum()), 'percentage': 0.0,
+                'numeric_means': {}, 'readmission_dist': {}}
+            for c in range(k)
+        }
+        model = ClusterModel(
+            feature_info, code_tables, scaler.mean_[:n_features], scaler.scale_[:n_features],
+            kmeans.cluster_centers_, profiles
+        )
+        export_compact(model, out / variant_file(name))
+    return out
+
+
+@pytest.fixture
+def make_registry(artifacts, variants_dir):
+    """make_registry(**kwargs) -> (registry, list of names the loader was called with)"""
+    calls = []
+
+    def loader(name):
+        calls.append(name)
+        if name == DEFAULT_MODEL:
+            return load_model(artifacts['models_dir'], neighbors=False)
+        return load_compact(variants_dir / variant_file(name))
+
+    def make(**kwargs):
+        return ModelRegistry(loader, ['k3', 'k5', 'no_meds', 'recoded'], **kwargs), calls
+
+    return make
+
+
+def test_lru_eviction_keeps_default(make_registry):
+    registry, calls = make_registry(max_models=3)
+    for name in ['default', 'k3', 'k5', 'k3', 'no_meds']:
+        registry.get(name)
+    # k5 was least recently used; default is pinned even though it is older
+    assert registry.loaded() == ['default', 'k3', 'no_meds']
+
+    registry.get('k5')
+    assert registry.loaded() == ['default', 'no_meds', 'k5']
+    assert calls == ['default', 'k3', 'k5', 'no_meds', 'k5']
+    assert set(registry.status()['loaded']) == {'default', 'no_meds', 'k5'}
+
+
+def test_memory_budget(make_registry):
+    registry, calls = make_registry(max_bytes=1)
+    registry.get('default')
+    registry.get('k3')
+    registry.get('k5')
+    # Over budget: only the pinned default and the model just requested stay
+    assert registry.loaded() == ['default', 'k5']
+    assert registry.loaded_bytes() == sum(registry.status()['loaded'].values())
+    registry.get('k3')
+    assert calls == ['default', 'k3', 'k5', 'k3']
+
+
+def test_resolve(make_registry):
+    registry, _ = make_registry()
+    assert registry.resolve('all') == ['default', 'k3', 'k5', 'no_meds', 'recoded']
+    assert registry.resolve('loaded') == ['default']
+    registry.get('k3')
+    assert registry.resolve('loaded') == ['k3']
+    assert registry.resolve(['k5', 'default', 'k5']) == ['k5', 'default']
+    assert registry.resolve('no_meds') == ['no_meds']
+    with pytest.raises(RequestError):
+        registry.resolve(['k3', 'nope'])
+    with pytest.raises(RequestError):
+        registry.resolve({'k3': True})
+    with pytest.raises(RequestError):
+        registry.get('nope')
+
+
+def test_fused_scores_match_each_model(make_registry, records):
+    registry, _ = make_registry()
+    names = ['default', 'k3', 'k5', 'no_meds', 'recoded']
+    fused = registry.fused(names)
+    assert [name for name, _ in fused.separate] == ['recoded']
+
+    results = registry.score_all(records, names)
+    for name in names:
+        model = registry.get(name)
+        X, _ = model.encode(records)
+        clusters, distances, margins = model.assign(X)
+        np.testing.assert_array_equal(results[name][0], clusters)
+        np.testing.assert_allclose(results[name][1], distances, rtol=1e-9, atol=1e-9)
+        np.testing.assert_allclose(results[name][2], margins, rtol=1e-9, atol=1e-9)
+
+
+def test_predict_all(make_registry, records):
+    registry, _ = make_registry()
+    response = registry.predict_all(records[0], ['default', 'k5', 'no_meds'])
+    assert list(response['models']) == ['default', 'k5', 'no_meds']
+    assert [response['models'][name]['k'] for name in response['models']] == [4, 5, 4]
+    model = registry.get('k5')
+    X, _ = model.encode(records[:1])
+    assert response['models']['k5']['cluster'] == int(model.assign(X)[0][0])